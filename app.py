@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Request, Response, request, jsonify, render_template
 from flask_cors import CORS
 from flask_mail import Mail, Message
 import smtplib
@@ -6,18 +6,56 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import requests
 import json
-from tensorflow.keras.models import load_model
 from tensorflow.keras.preprocessing import image
 import numpy as np
 import os
-import sqlite3
+import io
 import uuid
-from datetime import datetime, timedelta
+import zipfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
 import logging
+from batching import MicroBatcher
+from prediction_cache import PredictionCache, cache_key
+from inference_backends import load_backend
+from worker_pool import InferenceWorkerPool
+from image_decoding import decode_image
+from upload_guard import IMAGE_SIGNATURES, ZIP_SIGNATURES, GuardedUploadStream, UploadRejected, validate_image
+import disease_knowledge
+from db_pool import ConnectionPool
+import migrations
+import prediction_stats
+import feedback_stats
+import rollups
+from rollups import RollupCompactor
+from partitions import PartitionArchiver, PartitionStore
+from write_behind import PredictionWriter
+from async_serving import AsyncInferenceServer, DeadlineExceededError, QueueFullError
+import fast_json
+from fast_json import FastJSONProvider
+from compression import ResponseCompressor, etag_variants
+
+class InMemoryRequest(Request):
+    """Keep multipart uploads in memory instead of spooling them to temp files.
+
+    Each part is size-capped and magic-byte checked while it streams in, so oversized or
+    non-image parts abort the request before the rest of the body is read.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if filename and filename.lower().endswith('.zip'):
+            return GuardedUploadStream(MAX_ARCHIVE_BYTES, ZIP_SIGNATURES)
+        return GuardedUploadStream(MAX_UPLOAD_BYTES, IMAGE_SIGNATURES)
 
 app = Flask(__name__)
-CORS(app)
+app.request_class = InMemoryRequest
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
 
 # Email Configuration
 app.config['MAIL_SERVER'] = 'smtp.gmail.com'
@@ -35,13 +73,99 @@ CONTACT_EMAIL = "kartheeswarmails@gmail.com"
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
+ARCHIVE_UPLOADS = False  # Keep a copy of every upload in UPLOAD_FOLDER
+DECODE_JPEG_DRAFT = True  # Decode large JPEGs at 1/2, 1/4 or 1/8 scale before the final resize
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024  # Per image
+MAX_ARCHIVE_BYTES = 200 * 1024 * 1024  # Per zip archive for /predict/batch
+MAX_IMAGE_PIXELS = 50_000_000  # Larger images are rejected as possible decompression bombs
+app.config['MAX_CONTENT_LENGTH'] = MAX_ARCHIVE_BYTES + MAX_UPLOAD_BYTES
 FRUIT_MODEL_PATH = 'models/fruit_model.keras'
 LEAF_MODEL_PATH = 'models/leaf_disease_model.keras'
 FRUIT_MAPPING_PATH = 'mappings/fruit_classes.json'
 LEAF_MAPPING_PATH = 'mappings/leaf_classes.json'
 DATABASE_PATH = 'crop_disease_db.sqlite'
 
+# Disease knowledge base: versioned data file, reloaded without a restart when it changes
+DISEASE_DATA_PATH = 'knowledge/diseases.json'
+DISEASE_RELOAD_INTERVAL_SECONDS = 2
+DISEASE_CACHE_MAX_AGE = 3600  # Unversioned /disease URLs; ?v=<etag> URLs are cached for a year
+
+# Database
+DB_POOL_SIZE = 8  # Persistent SQLite connections shared by request threads
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16384,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,  # ms
+    'temp_store': 'MEMORY'
+}
+
+# Write-behind: queue prediction rows in memory and group-commit them from a background thread.
+# Ids are allocated in-process, so only enable this with a single server process.
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_MAX_QUEUE = 10000  # Requests block (then fail) once this many rows are waiting
+WRITE_BEHIND_FLUSH_SIZE = 256
+WRITE_BEHIND_FLUSH_MS = 50
+
+# Trend rollups: hourly buckets older than this are compacted into daily ones
+ROLLUP_HOURLY_RETENTION_HOURS = 48
+ROLLUP_COMPACT_INTERVAL_SECONDS = 300
+TRENDS_MAX_DAYS = 366
+
+# Month partitions: predictions older than the hot window move to one SQLite file per month under
+# PARTITION_ARCHIVE_DIR; /history and feedback lookups read across them
+PARTITION_ARCHIVE_DIR = 'archive'
+PARTITION_HOT_MONTHS = 1  # 1 keeps only the current month in DATABASE_PATH
+PARTITION_RETENTION_MONTHS = None  # e.g. 24 deletes archive files older than two years; None keeps them
+PARTITION_ARCHIVE_INTERVAL_SECONDS = 3600
+PARTITION_CHUNK_ROWS = 500  # Rows moved per write transaction
+
+# Inference backend per model: ('keras', .keras file), ('tflite', .tflite file), ('onnx', .onnx file)
+# or ('savedmodel', directory). Use convert_models.py to produce the TFLite/ONNX files and
+# export_serving_model.py for a SavedModel that decodes encoded image bytes inside the graph.
+MODEL_BACKENDS = {
+    'fruit': ('keras', FRUIT_MODEL_PATH),
+    'leaf': ('keras', LEAF_MODEL_PATH)
+}
+
+# Inference batching
+BATCH_MAX_SIZE = 16
+BATCH_MAX_WAIT_MS = 5
+BULK_MAX_IMAGES = 500
+WARMUP_BATCH_SIZES = [1, 4, BATCH_MAX_SIZE]
+
+# Multi-process inference: 0 keeps inference in the web process, None uses one worker per available core
+WORKER_POOL_SIZE = 0
+WORKER_POOL_PIN_CORES = True
+
+# Cascade inference: a compact model (train_cascade_model.py) answers when its confidence clears the
+# per-class threshold, otherwise the request escalates to the full model. The fast model must take
+# the same input as the full one, so use the same backend kind for both stages.
+CASCADE_ENABLED = False
+CASCADE_MODELS = {
+    'fruit': ('keras', 'models/fruit_model_fast.keras', 'mappings/fruit_cascade_thresholds.json'),
+    'leaf': ('keras', 'models/leaf_disease_model_fast.keras', 'mappings/leaf_cascade_thresholds.json')
+}
+CASCADE_DEFAULT_THRESHOLD = 0.9
+
+# Serving mode: 'threaded' sends requests straight to the micro-batchers, 'async' adds a bounded
+# admission queue per model with per-request deadlines and 503 load shedding
+SERVING_MODE = 'threaded'
+ASYNC_MAX_QUEUE_SIZE = 64
+REQUEST_DEADLINE_SECONDS = 30
+RETRY_AFTER_SECONDS = 1
+COMPRESS_MIN_BYTES = 1024  # Smaller responses are sent uncompressed
+COMPRESS_GZIP_LEVEL = 6
+COMPRESS_BROTLI_QUALITY = 4  # Brotli is used when installed and the client accepts it
+
+# Prediction cache
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL_SECONDS = 24 * 3600
+CACHE_DB_PATH = None  # e.g. 'prediction_cache.sqlite' to keep cached predictions across restarts
+CACHE_DB_MAX_ENTRIES = 100000  # Oldest persisted entries beyond this are pruned
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Setup logging
@@ -51,920 +175,315 @@ logger = logging.getLogger(__name__)
 # Load models
 models = {}
 class_mappings = {}
+batchers = {}
+model_versions = {}
+worker_pool = None
+async_server = None
+prediction_writer = None
+rollup_compactor = None
+partition_archiver = None
+cascade_thresholds = {}
+cascade_stats = {}
+cascade_lock = threading.Lock()
+db_pool = ConnectionPool(DATABASE_PATH, DB_POOL_SIZE, DB_PRAGMAS)
+partition_store = PartitionStore(
+    db_pool, PARTITION_ARCHIVE_DIR,
+    hot_months=PARTITION_HOT_MONTHS,
+    retention_months=PARTITION_RETENTION_MONTHS,
+    chunk_size=PARTITION_CHUNK_ROWS
+)
+prediction_cache = PredictionCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_DB_PATH, CACHE_DB_MAX_ENTRIES)
+response_compressor = ResponseCompressor(COMPRESS_MIN_BYTES, COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY)
+response_compressor.init_app(app)
 
-def load_models():
-    """Load both fruit and leaf models"""
-    # Load fruit model
+def model_file_version(path):
+    """Identify a model file by its size and modification time"""
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+LEAF_FALLBACK_CLASSES = {
+    0: 'Pepper__bell___Bacterial_spot',
+    1: 'Pepper__bell___healthy',
+    2: 'Potato___Early_blight',
+    3: 'Potato___Late_blight',
+    4: 'Potato___healthy',
+    5: 'Tomato_Bacterial_spot',
+    6: 'Tomato_Early_blight',
+    7: 'Tomato_Late_blight',
+    8: 'Tomato_Leaf_Mold',
+    9: 'Tomato_healthy'
+}
+
+MODEL_SOURCES = {
+    'fruit': (FRUIT_MAPPING_PATH, {}),
+    'leaf': (LEAF_MAPPING_PATH, LEAF_FALLBACK_CLASSES)
+}
+
+# Per-model readiness: loading -> warming -> ready, or failed
+model_status = {
+    model_type: {'state': 'loading', 'backend': MODEL_BACKENDS[model_type][0], 'load_seconds': None, 'warmup_seconds': None, 'error': None}
+    for model_type in MODEL_SOURCES
+}
+
+def load_single_model(model_type):
+    """Load, warm up and start batching for one model"""
+    backend, model_path = MODEL_BACKENDS[model_type]
+    mapping_path, fallback_classes = MODEL_SOURCES[model_type]
+    status = model_status[model_type]
+    status.update(state='loading', load_seconds=None, warmup_seconds=None, error=None)
+    started = time.perf_counter()
     try:
-        models['fruit'] = load_model(FRUIT_MODEL_PATH)
-        with open(FRUIT_MAPPING_PATH, 'r') as f:
-            class_mappings['fruit'] = {int(k): v for k, v in json.load(f).items()}
-        logger.info(f"Fruit model loaded: {len(class_mappings['fruit'])} classes")
+        if worker_pool is not None:
+            model = worker_pool.model(model_type)
+        else:
+            model = load_backend(backend, model_path)
+        with open(mapping_path, 'r') as f:
+            class_mappings[model_type] = {int(k): v for k, v in json.load(f).items()}
+        model_versions[model_type] = f"{backend}-{model_file_version(model_path)}"
+        status['load_seconds'] = round(time.perf_counter() - started, 3)
+        logger.info(f"{model_type.capitalize()} model loaded ({backend}): {len(class_mappings[model_type])} classes")
+
+        status['state'] = 'warming'
+        started = time.perf_counter()
+        if worker_pool is None:
+            # Pool workers warm up their own copies before reporting ready
+            warm_up_model(model)
+        status['warmup_seconds'] = round(time.perf_counter() - started, 3)
+
+        if CASCADE_ENABLED and model_type in CASCADE_MODELS:
+            load_fast_stage(model_type, model)
+
+        models[model_type] = model
+        start_batcher(model_type)
+        status['state'] = 'ready'
     except Exception as e:
-        logger.error(f"Error loading fruit model: {e}")
-        models['fruit'] = None
-        class_mappings['fruit'] = {}
+        logger.error(f"Error loading {model_type} model: {e}")
+        models[model_type] = None
+        class_mappings[model_type] = dict(fallback_classes)
+        status.update(state='failed', error=str(e))
+
+def fast_stage_key(model_type):
+    return f"{model_type}_fast"
 
-    # Load leaf model
+def serving_backends():
+    """Every backend that serves traffic: the full models plus enabled cascade fast stages"""
+    backends = dict(MODEL_BACKENDS)
+    if CASCADE_ENABLED:
+        for model_type, (backend, model_path, _) in CASCADE_MODELS.items():
+            backends[fast_stage_key(model_type)] = (backend, model_path)
+    return backends
+
+def load_fast_stage(model_type, full_model):
+    """Load the cascade's compact model; on failure the full model keeps serving on its own"""
+    backend, model_path, thresholds_path = CASCADE_MODELS[model_type]
+    key = fast_stage_key(model_type)
     try:
-        models['leaf'] = load_model(LEAF_MODEL_PATH)
-        with open(LEAF_MAPPING_PATH, 'r') as f:
-            class_mappings['leaf'] = {int(k): v for k, v in json.load(f).items()}
-        logger.info(f"Leaf model loaded: {len(class_mappings['leaf'])} classes")
+        if worker_pool is not None:
+            model = worker_pool.model(key)
+        else:
+            model = load_backend(backend, model_path)
+            warm_up_model(model)
+        if getattr(model, 'accepts_bytes', False) != getattr(full_model, 'accepts_bytes', False):
+            raise ValueError('fast and full models must take the same input')
+
+        thresholds = {}
+        if os.path.exists(thresholds_path):
+            with open(thresholds_path, 'r') as f:
+                thresholds = json.load(f)
+        cascade_thresholds[model_type] = thresholds
+        cascade_stats[model_type] = {'fast': 0, 'full': 0}
+        model_versions[model_type] += f"+{backend}-{model_file_version(model_path)}"
+
+        models[key] = model
+        start_batcher(key)
+        logger.info(f"Cascade enabled for {model_type}: {len(thresholds)} calibrated class thresholds")
     except Exception as e:
-        logger.error(f"Error loading leaf model: {e}")
-        models['leaf'] = None
-        class_mappings['leaf'] = {
-            0: 'Pepper__bell___Bacterial_spot',
-            1: 'Pepper__bell___healthy',
-            2: 'Potato___Early_blight',
-            3: 'Potato___Late_blight',
-            4: 'Potato___healthy',
-            5: 'Tomato_Bacterial_spot',
-            6: 'Tomato_Early_blight',
-            7: 'Tomato_Late_blight',
-            8: 'Tomato_Leaf_Mold',
-            9: 'Tomato_healthy'
-        }
+        logger.error(f"Cascade disabled for {model_type}, fast model failed to load: {e}")
 
-def init_database():
-    """Initialize SQLite database with backward compatibility"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Check if predictions table exists and what columns it has
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='predictions';")
-    table_exists = cursor.fetchone()
-    
-    if table_exists:
-        # Check existing columns
-        cursor.execute("PRAGMA table_info(predictions);")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        # Add model_type column if it doesn't exist
-        if 'model_type' not in columns:
-            try:
-                cursor.execute('ALTER TABLE predictions ADD COLUMN model_type TEXT DEFAULT "leaf";')
-                logger.info("Added model_type column to existing predictions table")
-            except sqlite3.OperationalError:
-                logger.info("model_type column already exists or cannot be added")
-    else:
-        # Create new table with all columns
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS predictions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                model_type TEXT DEFAULT "leaf",
-                predicted_class TEXT,
-                confidence REAL,
-                class_index INTEGER,
-                filename TEXT,
-                user_ip TEXT
-            )
-        ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            prediction_id INTEGER,
-            rating INTEGER CHECK(rating >= 1 AND rating <= 5),
-            is_correct BOOLEAN,
-            comment TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (prediction_id) REFERENCES predictions (id)
-        )
-    ''')
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS contacts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            subject TEXT,
-            message TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+def cascade_available(model_type):
+    return CASCADE_ENABLED and models.get(fast_stage_key(model_type)) is not None
+
+def run_cascade(inputs):
+    """Run each model's fast stage first and escalate only the rows it is not confident about.
+
+    `inputs` maps model_type to its input batch. Returns {model_type: (rows, timings, stages)}
+    where stages holds 'fast' or 'full' per row.
+    """
+    results = {}
+    escalate = {}
+    fast = {model_type: batch for model_type, batch in inputs.items() if cascade_available(model_type)}
+    fast_results = run_inference_concurrently({fast_stage_key(model_type): batch for model_type, batch in fast.items()}) if fast else {}
+
+    for model_type, batch in inputs.items():
+        if model_type not in fast:
+            escalate[model_type] = batch
+            continue
+        rows, timing = fast_results[fast_stage_key(model_type)]
+        thresholds = cascade_thresholds[model_type]
+        confident = np.array([
+            row[index] >= thresholds.get(class_mappings[model_type].get(int(index)), CASCADE_DEFAULT_THRESHOLD)
+            for row, index in zip(rows, np.argmax(rows, axis=1))
+        ])
+        with cascade_lock:
+            cascade_stats[model_type]['fast'] += confident.sum()
+            cascade_stats[model_type]['full'] += (~confident).sum()
+        results[model_type] = (np.array(rows, copy=True), timing, np.where(confident, 'fast', 'full'))
+        if not confident.all():
+            escalate[model_type] = batch[~confident]
+
+    for model_type, (rows, timing) in (run_inference_concurrently(escalate) if escalate else {}).items():
+        if model_type in results:
+            merged, _, stages = results[model_type]
+            merged[stages == 'full'] = rows
+            results[model_type] = (merged, timing, stages)
+        else:
+            results[model_type] = (rows, timing, np.full(len(rows), 'full'))
+    return results
+
+def warm_up_model(model):
+    """Run dummy batches at every configured batch size so the first real request is not traced"""
+    for batch_size in sorted(set(WARMUP_BATCH_SIZES)):
+        model.predict(np.zeros((batch_size, 224, 224, 3), dtype=np.float32), verbose=0)
+
+def load_models():
+    """Load both fruit and leaf models concurrently"""
+    global worker_pool
+    if WORKER_POOL_SIZE != 0 and worker_pool is None:
+        worker_pool = InferenceWorkerPool(
+            serving_backends(),
+            num_workers=WORKER_POOL_SIZE,
+            max_rows=BATCH_MAX_SIZE,
+            pin_cores=WORKER_POOL_PIN_CORES,
+            warmup_batch_sizes=WARMUP_BATCH_SIZES
         )
-    ''')
-    
-    conn.commit()
-    conn.close()
+        worker_pool.start()
 
-def get_comprehensive_disease_info(disease_class, model_type, confidence=1.0):
-    """Get comprehensive disease information with handling for both actual and generic classifications"""
-    
-    # Complete fruit disease database for your 4 trained classes
-    fruit_diseases = {
-        'Apple_Black_Rot': {
-            'type': 'Fungal Disease',
-            'pathogen': 'Botryosphaeria obtusa',
-            'severity': 'High',
-            'economic_impact': 'Can cause 20-80% yield loss if left untreated',
-            'description': 'Black rot is a serious fungal disease that causes circular, brown to black lesions on apple fruits, eventually leading to complete fruit rot and mummification.',
-            'symptoms': [
-                'Circular brown spots on fruit surface that gradually enlarge',
-                'Black rot spreading inward from wounds or stem end',
-                'Concentric rings visible in advanced lesions (bull\'s-eye pattern)',
-                'Fruit mummification and shriveling over time',
-                'Premature fruit drop from tree branches',
-                'Sweet, fermented odor emanating from infected fruits',
-                'Dark, sunken lesions that become leathery in texture',
-                'Secondary bacterial infections through rot wounds'
-            ],
-            'remedies': [
-                'Apply Captan 50% WP @ 2g/L water every 10-14 days during growing season',
-                'Spray Mancozeb 75% WP @ 2.5g/L water during wet weather conditions',
-                'Use Propiconazole 25% EC @ 1ml/L water for systemic fungal control',
-                'Apply Copper Oxychloride 50% WP @ 3g/L water as protective spray',
-                'Remove and destroy all infected fruits immediately upon detection',
-                'Prune dead and diseased wood during dormant winter season',
-                'Apply Thiophanate-methyl @ 1g/L water for severe infections',
-                'Use Ziram 76% WP @ 2g/L water as preventive measure'
-            ],
-            'prevention': [
-                'Maintain proper orchard sanitation practices year-round',
-                'Remove all mummified fruits and fallen debris regularly',
-                'Prune trees for good air circulation and sunlight penetration',
-                'Apply dormant season copper sprays in late winter',
-                'Use disease-resistant apple varieties when replanting orchards',
-                'Avoid mechanical wounds during harvest and handling operations',
-                'Ensure proper storage conditions (temperature 32-40°F, humidity 85-90%)',
-                'Implement integrated pest management to reduce insect wounds'
-            ],
-            'organic_remedies': [
-                'Neem oil spray @ 5ml/L water with surfactant every 7-10 days',
-                'Baking soda solution @ 5g/L water + liquid soap as foliar spray',
-                'Bordeaux mixture @ 1% concentration during dormant season',
-                'Compost tea application weekly during active growing season',
-                'Essential oil blends (thyme, oregano) @ 2ml/L water',
-                'Potassium bicarbonate @ 3g/L water for leaf and fruit treatment',
-                'Milk spray @ 1:9 ratio with water (natural fungicidal properties)',
-                'Diatomaceous earth dusting around tree base for prevention'
-            ],
-            'maintenance': [
-                'Monitor orchards weekly during growing season for early symptoms',
-                'Maintain proper tree nutrition with balanced fertilizer program',
-                'Ensure adequate drainage around tree root zones',
-                'Regular equipment sanitization with 10% bleach solution',
-                'Weather monitoring for infection-favorable conditions',
-                'Record keeping of all treatments and their effectiveness'
-            ]
-        },
-        
-        'Apple_Cedar_Rust': {
-            'type': 'Fungal Disease',
-            'pathogen': 'Gymnosporangium juniperi-virginianae',
-            'severity': 'Medium to High',
-            'economic_impact': 'Moderate to severe yield loss, primarily affects fruit quality and leaf health',
-            'description': 'Cedar apple rust is a unique fungal disease requiring both apple trees and juniper/cedar trees to complete its complex two-host life cycle.',
-            'symptoms': [
-                'Bright yellow-orange spots on upper leaf surfaces in spring',
-                'Circular lesions with small black dots (spermogonia) in centers',
-                'Orange, tube-like projections on leaf undersides during humid weather',
-                'Premature defoliation starting from lower branches',
-                'Fruit lesions causing cracking, distortion, and unmarketable appearance',
-                'Reduced photosynthetic capacity leading to weakened trees',
-                'Gall formation on juniper hosts (alternate host)',
-                'Orange gelatinous horns emerging from cedar galls in spring'
-            ],
-            'remedies': [
-                'Apply Myclobutanil 10% WP @ 0.5ml/L water at green tip stage',
-                'Spray Tebuconazole 25.9% EC @ 1ml/L water every 14 days',
-                'Use Triadimefon 25% WP @ 0.5g/L water from pre-bloom through summer',
-                'Apply protective fungicides from green tip to petal fall stage',
-                'Remove alternate host plants (juniper trees) within 2-mile radius if feasible',
-                'Use systemic fungicides during critical infection periods',
-                'Apply Propiconazole @ 1ml/L water for curative treatment',
-                'Implement copper-based sprays during dormant season'
-            ],
-            'prevention': [
-                'Plant cedar rust-resistant apple varieties (Liberty, Enterprise, Pristine)',
-                'Remove or chemically treat nearby juniper and cedar trees',
-                'Apply preventive fungicide sprays starting at green tip stage',
-                'Monitor weather conditions closely for infection periods (wet, warm spring days)',
-                'Ensure proper tree spacing for optimal air circulation',
-                'Conduct regular orchard inspections during growing season',
-                'Implement windbreaks to reduce spore dispersal',
-                'Time pruning to avoid creating susceptible new growth during spore release'
-            ],
-            'organic_remedies': [
-                'Sulfur spray @ 3g/L water during dry conditions (avoid hot weather)',
-                'Copper soap fungicide application at recommended label rates',
-                'Horticultural oil + sulfur combination for dual action',
-                'Remove infected plant parts immediately and destroy',
-                'Beneficial microorganism applications (Bacillus subtilis)',
-                'Compost tea enriched with beneficial fungi',
-                'Garlic and hot pepper spray as natural fungicide',
-                'Encourage beneficial insects that feed on rust spores'
-            ],
-            'maintenance': [
-                'Scout for symptoms weekly from bud break through summer',
-                'Maintain detailed records of weather conditions and disease pressure',
-                'Coordinate with neighboring property owners for area-wide management',
-                'Regular soil testing and appropriate fertilization programs',
-                'Proper irrigation management to avoid prolonged leaf wetness',
-                'Annual evaluation of resistant variety performance'
-            ]
-        },
-        
-        'Apple_Scab': {
-            'type': 'Fungal Disease',
-            'pathogen': 'Venturia inaequalis',
-            'severity': 'Very High',
-            'economic_impact': 'Can cause 50-100% crop loss in susceptible varieties under favorable conditions',
-            'description': 'Apple scab is the most economically important and widespread fungal disease of apples worldwide, causing significant losses in both yield and fruit quality.',
-            'symptoms': [
-                'Dark olive-green to black spots on leaves, typically starting on undersides',
-                'Scabby, corky, and raised lesions on fruit surface',
-                'Premature yellowing and drop of infected leaves',
-                'Cracked and severely deformed fruit skin',
-                'Reduced fruit size and complete unmarketability',
-                'Secondary infections entering through scab-induced cracks',
-                'Velvety appearance of lesions under humid conditions',
-                'Complete defoliation in severe infection cases'
-            ],
-            'remedies': [
-                'Apply Dodine 65% WP @ 1g/L water during early season (pre-bloom)',
-                'Spray Captan 50% WP @ 2g/L water regularly throughout season',
-                'Use Mancozeb 75% WP @ 2.5g/L water for protective coverage',
-                'Apply elemental sulfur @ 3g/L water (avoid during hot weather)',
-                'Rotate fungicide modes of action to prevent resistance development',
-                'Time applications based on weather-driven infection models',
-                'Use Flutriafol @ 0.3ml/L water for systemic protection',
-                'Apply Kresoxim-methyl @ 0.5ml/L water for curative action'
-            ],
-            'prevention': [
-                'Plant scab-resistant apple varieties (Liberty, Enterprise, Freedom, Prima)',
-                'Remove and compost all fallen leaves in autumn (reduces inoculum)',
-                'Prune trees for excellent air circulation and rapid leaf drying',
-                'Apply dormant oil sprays in late winter to suppress overwintering spores',
-                'Start protective fungicide program at green tip growth stage',
-                'Monitor ascospore release using weather-based prediction models',
-                'Maintain proper tree nutrition to promote natural disease resistance',
-                'Implement sanitation practices including equipment disinfection'
-            ],
-            'organic_remedies': [
-                'Lime sulfur spray during dormant season @ 3% concentration',
-                'Baking soda @ 5g/L water + horticultural oil combination',
-                'Weekly compost tea applications enriched with beneficial microbes',
-                'Milk spray @ 1:10 ratio with water (lactoferrin antifungal properties)',
-                'Potassium bicarbonate @ 5g/L water for alkaline fungicidal action',
-                'Sodium bicarbonate @ 3g/L water + spreader-sticker',
-                'Fermented plant extract sprays (nettle, horsetail)',
-                'Clay-based foliar sprays for physical barrier protection'
-            ],
-            'maintenance': [
-                'Daily weather monitoring during critical infection periods',
-                'Regular calibration of spray equipment for proper coverage',
-                'Detailed record keeping of all treatments and weather conditions',
-                'Annual assessment of fungicide resistance development',
-                'Coordination with extension services for regional disease alerts',
-                'Proper storage and handling of fungicides according to label requirements'
-            ]
-        },
-        
-        'Apple_Healthy': {
-            'type': 'Healthy Plant',
-            'severity': 'N/A (Healthy)',
-            'economic_impact': 'Positive - healthy trees produce maximum marketable fruit',
-            'description': 'Apple fruit appears completely healthy with vibrant coloration, no disease symptoms, and excellent commercial quality potential.',
-            'symptoms': [
-                'Bright, uniform fruit coloration appropriate for variety',
-                'Smooth, unblemished skin without spots or lesions',
-                'Normal fruit size and shape for the cultivar',
-                'Healthy green foliage with no discoloration',
-                'Strong fruit attachment to branches',
-                'No signs of decay, cracking, or deformation',
-                'Fresh, crisp texture when tested',
-                'Pleasant varietal aroma without off-odors'
-            ],
-            'maintenance': [
-                'Continue regular deep watering schedule (1-2 inches per week)',
-                'Apply balanced fertilizer (10-10-10 or 12-12-12) monthly during growing season',
-                'Monitor weekly for early disease symptoms throughout season',
-                'Maintain proper pruning schedule for optimal tree structure and health',
-                'Keep orchard floor clean from fallen fruit and debris',
-                'Inspect regularly for pest damage (aphids, mites, scale)',
-                'Ensure proper harvest timing for maximum quality and storage life',
-                'Conduct soil tests annually and amend as needed'
-            ],
-            'prevention': [
-                'Maintain regular weekly health inspections throughout growing season',
-                'Implement proper nutrition management based on annual soil testing',
-                'Provide adequate water supply without creating waterlogged conditions',
-                'Continue preventive spray schedule for common diseases and pests',
-                'Practice comprehensive integrated pest management (IPM) program',
-                'Ensure optimal harvest timing and gentle handling procedures',
-                'Maintain proper post-harvest storage conditions',
-                'Plan for regular equipment maintenance and calibration'
-            ],
-            'best_practices': [
-                'Conduct annual comprehensive soil testing and amendment programs',
-                'Apply appropriate organic mulch around tree base (maintain 6-inch clear zone)',
-                'Implement regular equipment sanitization protocols',
-                'Monitor weather patterns for potential disease pressure periods',
-                'Maintain detailed orchard records for long-term management planning',
-                'Participate in regional pest and disease monitoring programs',
-                'Consider beneficial insect habitat enhancement',
-                'Plan for sustainable long-term orchard productivity'
-            ],
-            'organic_remedies': [
-                'Continue beneficial microorganism soil applications',
-                'Apply compost tea monthly for soil and plant health',
-                'Use organic mulches to maintain soil moisture and suppress weeds',
-                'Implement companion planting for natural pest management',
-                'Apply seaweed extract foliar feeds for trace element nutrition',
-                'Use beneficial insect attractant plants around orchard perimeter'
-            ],
-            'remedies': [
-                'No treatment required - maintain current excellent management practices',
-                'Continue preventive care program that has achieved this healthy status',
-                'Monitor closely to catch any potential issues before they become problems',
-                'Maintain optimal growing conditions through proper cultural practices'
-            ]
-        },
-        
-        # Handle generic fruit classifications that your current model might return
-        'APPLE': {
-            'type': '🍎 Apple Fruit Detected',
-            'severity': 'Model Classification Issue',
-            'economic_impact': 'Requires proper disease-specific identification',
-            'description': 'The system correctly identified this as an apple fruit, but could not determine the specific disease status. This suggests the model needs retraining for disease-specific classification.',
-            'symptoms': [
-                '✅ Apple fruit successfully detected with high confidence',
-                '⚠️ However, specific disease classification was not determined',
-                '🔍 The image shows an apple but disease status is unclear',
-                '📊 Model confidence indicates good fruit identification',
-                '🎯 Need disease-specific classification for proper diagnosis',
-                '⚡ Consider using a specialized apple disease detection model'
-            ],
-            'remedies': [
-                '🔄 Re-upload image with clearer disease symptoms if present',
-                '💡 Try uploading images that clearly show disease lesions or healthy tissue',
-                '📸 Use high-quality, well-lit images focused on fruit surface',
-                '🔍 For disease identification, upload close-up images of affected areas',
-                '👨‍🌾 Consult agricultural extension services for visual disease identification',
-                '🧪 Consider laboratory testing for precise pathogen identification',
-                '📚 Compare with visual disease identification guides',
-                '🔄 If fruit appears healthy, it may be classified as "Healthy Apple"'
-            ],
-            'prevention': [
-                '✅ Good news: Apple fruit properly identified by AI system',
-                '🎯 For better results, use images showing clear disease symptoms',
-                '📱 Ensure proper image quality: good lighting, focus, and resolution',
-                '🔍 Focus camera on specific areas of interest (lesions, healthy tissue)',
-                '⚖️ Consider multiple images from different angles if uncertain',
-                '📖 Review common apple disease symptoms before photographing'
-            ],
-            'organic_remedies': [
-                '🌿 General apple health: Regular organic care and monitoring',
-                '🍃 Preventive organic sprays during growing season',
-                '🧪 Natural fungicides for general disease prevention',
-                '💧 Proper watering and nutrition management',
-                '🌱 Beneficial microorganism applications',
-                '🐛 Integrated pest management practices'
-            ],
-            'maintenance': [
-                'Since this is an apple, follow general apple care guidelines',
-                'Monitor for specific disease symptoms for accurate identification', 
-                'Use disease-specific identification resources',
-                'Consider professional agricultural consultation if problems persist'
-            ]
-        },
-        
-        # Handle other possible fruit classifications
-        'MANGO': {
-            'type': '🥭 Non-Apple Fruit Detected',
-            'severity': 'Model Scope Limitation',
-            'economic_impact': 'System optimized for apple diseases only',
-            'description': 'The system detected a mango fruit, but this model is specifically designed for Apple disease identification only.',
-            'symptoms': [
-                '✅ Mango fruit successfully detected with high confidence',
-                '⚠️ However, this system is trained only for Apple diseases',
-                '🍎 Supported: Apple Black Rot, Apple Cedar Rust, Apple Scab, Apple Healthy',
-                '❌ Not supported: Mango and other non-apple fruits',
-                '🎯 For mango diseases, use specialized mango pathology resources',
-                '🔄 For leaf diseases of other crops, try the Leaf Detection model'
-            ],
-            'remedies': [
-                '🍎 For Apple diseases: Upload images of apple fruits with clear disease symptoms',
-                '🍃 For other crop diseases: Switch to the Leaf Detection model',
-                '🥭 For Mango-specific diseases: Consult mango pathology specialists',
-                '📱 For general fruit diseases: Seek specialized agricultural apps',
-                '👨‍🌾 Professional Help: Contact local agricultural experts',
-                '📚 Research: Look up mango-specific disease identification guides'
-            ],
-            'prevention': [
-                '✅ Use the correct model: Fruit Model = Apple diseases only',
-                '🍃 Leaf Model = Multi-crop support (Tomato, Potato, Pepper)',
-                '📸 For best results, use images matching the model training data',
-                '🎯 Upload apple fruit images for fruit disease detection'
-            ],
-            'organic_remedies': [
-                '🌿 General fruit care: Proper watering, nutrition, and pruning',
-                '🛡️ Preventive measures: Regular monitoring and integrated pest management',
-                '🌱 Organic protection: Neem oil, copper-based fungicides',
-                '📚 Mango-specific: Research organic mango disease management'
-            ],
-            'maintenance': [
-                'For accurate disease identification, use the appropriate model',
-                'Apple fruits → Use Fruit Detection Model',
-                'Other crop leaves → Use Leaf Detection Model',
-                'Consult specialized resources for non-supported crops'
-            ]
-        }
-    }
-    
-    # Comprehensive leaf disease database
-    leaf_diseases = {
-        'Pepper__bell___Bacterial_spot': {
-            'type': 'Bacterial Disease',
-            'pathogen': 'Xanthomonas campestris pv. vesicatoria',
-            'severity': 'Medium to High',
-            'economic_impact': 'Reduces fruit quality and marketability by 15-30%',
-            'description': 'Bacterial spot causes lesions on pepper leaves, stems, and fruits, significantly impacting crop quality.',
-            'symptoms': [
-                'Small dark brown to black lesions on leaves',
-                'Water-soaked margins around infected areas',
-                'Fruit scarring and surface blemishes reducing market value',
-                'Reduced overall marketable yield',
-                'Premature leaf drop in severe infections',
-                'Stem cankers in advanced disease cases',
-                'Yellow halos around some leaf lesions',
-                'Fruit cracking and secondary rot infections'
-            ],
-            'remedies': [
-                'Apply copper-based bactericides @ 2-3g/L water weekly',
-                'Use Streptomycin sulfate where legally permitted @ 200ppm',
-                'Remove and destroy infected plant debris immediately',
-                'Improve air circulation around plants through proper spacing',
-                'Apply protective bactericide sprays preventively',
-                'Use copper hydroxide @ 2g/L water for bacterial control',
-                'Implement drip irrigation to reduce leaf wetness',
-                'Apply Bacillus subtilis biological control agents'
-            ],
-            'prevention': [
-                'Use certified disease-free seeds and transplants exclusively',
-                'Practice strict 3-year crop rotation with non-host plants',
-                'Avoid overhead irrigation systems that promote disease spread',
-                'Maintain proper plant spacing (45-60cm apart) for air circulation',
-                'Disinfect all tools between plants with 10% bleach solution',
-                'Remove crop residues immediately after final harvest',
-                'Implement plastic mulch to reduce soil splash',
-                'Monitor and control insect vectors that spread bacteria'
-            ],
-            'organic_remedies': [
-                'Copper soap applications according to organic certification standards',
-                'Beneficial bacteria sprays (Pseudomonas fluorescens)',
-                'Plant-based extracts (garlic, ginger) @ recommended concentrations',
-                'Proper cultural practices emphasizing plant health',
-                'Compost tea applications weekly for beneficial microorganisms',
-                'Essential oil sprays (oregano, thyme) for natural antimicrobial action',
-                'Baking soda solution @ 5g/L water for alkaline bactericidal effect'
-            ],
-            'maintenance': [
-                'Weekly scouting for early symptom detection',
-                'Weather monitoring for bacterial infection-favorable conditions',
-                'Regular soil testing and appropriate fertilization',
-                'Equipment calibration for proper spray coverage',
-                'Record keeping of all treatments and their effectiveness'
-            ]
-        },
-        
-        'Pepper__bell___healthy': {
-            'type': 'Healthy Plant',
-            'severity': 'N/A (Healthy)',
-            'economic_impact': 'Positive - healthy plants produce maximum marketable yield',
-            'description': 'Bell pepper plant appears healthy with no signs of disease.',
-            'symptoms': [
-                'Vibrant green foliage with uniform coloration',
-                'Strong, upright plant structure',
-                'Normal leaf size and shape for variety',
-                'No visible lesions, spots, or discoloration',
-                'Healthy fruit development and attachment',
-                'Good overall plant vigor and growth rate'
-            ],
-            'maintenance': [
-                'Provide consistent watering (1 inch per week)',
-                'Support plants as fruits develop using stakes or cages',
-                'Monitor for common pepper diseases weekly',
-                'Apply balanced fertilizer every 3-4 weeks during growing season',
-                'Maintain proper plant spacing for good air flow',
-                'Remove any fallen debris or diseased plant material'
-            ],
-            'prevention': [
-                'Continue current healthy growing practices',
-                'Regular monitoring for early disease symptoms',
-                'Proper nutrition and consistent watering schedule',
-                'Good garden hygiene and sanitation',
-                'Preventive organic sprays if disease pressure increases'
-            ],
-            'organic_remedies': [
-                'Continue beneficial soil microorganism applications',
-                'Weekly compost tea for plant health maintenance',
-                'Organic mulching to maintain soil moisture',
-                'Companion planting for natural pest deterrence'
-            ],
-            'remedies': [
-                'No treatment required - maintain excellent current practices',
-                'Continue preventive care that achieved this healthy status',
-                'Monitor closely for any changes in plant health'
-            ]
-        },
-        
-        'Tomato_Bacterial_spot': {
-            'type': 'Bacterial Disease',
-            'pathogen': 'Xanthomonas vesicatoria',
-            'severity': 'High',
-            'economic_impact': 'Can reduce yield by 30-50%',
-            'description': 'Bacterial spot causes small, dark lesions on tomato leaves, stems, and fruits.',
-            'symptoms': [
-                'Small dark brown to black spots on leaves',
-                'Water-soaked margins around lesions',
-                'Yellow halos around spots on leaves',
-                'Defoliation starting from lower leaves',
-                'Fruit lesions with raised, corky texture',
-                'Reduced photosynthetic area',
-                'Stem lesions and cankers',
-                'Secondary fruit rot infections'
-            ],
-            'remedies': [
-                'Apply Copper-based bactericides @ 2-3g/L water',
-                'Use Streptomycin sulfate 200-300 ppm spray',
-                'Remove and destroy infected plant debris',
-                'Apply Bacillus subtilis-based bio-fungicide',
-                'Spray Bordeaux mixture (1%) during cool weather',
-                'Improve drainage around plants',
-                'Use copper hydroxide @ 2g/L water',
-                'Apply protective bactericides preventively'
-            ],
-            'prevention': [
-                'Use certified disease-free seeds and transplants',
-                'Maintain proper plant spacing (45-60cm apart)',
-                'Avoid overhead irrigation, use drip irrigation',
-                'Remove crop residues immediately after harvest',
-                'Practice 3-year crop rotation with non-solanaceous crops',
-                'Disinfect tools with 10% bleach solution between plants',
-                'Implement plastic mulch to reduce soil splash',
-                'Control insect vectors of bacterial diseases'
-            ],
-            'organic_remedies': [
-                'Neem oil spray @ 5ml/L water weekly',
-                'Baking soda solution @ 5g/L water',
-                'Garlic extract spray @ 50g/L water',
-                'Copper soap fungicide application',
-                'Beneficial bacteria applications',
-                'Compost tea weekly applications',
-                'Essential oil sprays for antimicrobial action'
-            ]
-        },
-        
-        'Tomato_Early_blight': {
-            'type': 'Fungal Disease',
-            'pathogen': 'Alternaria solani',
-            'severity': 'High',
-            'economic_impact': 'Yield losses of 25-75% possible',
-            'description': 'Early blight is characterized by concentric ring lesions and affects leaves, stems, and fruits.',
-            'symptoms': [
-                'Circular to oval brown lesions with concentric rings',
-                'Target-like appearance of lesions',
-                'Yellow halos around lesions',
-                'Lower leaves affected first, progressing upward',
-                'Stem lesions near soil line',
-                'Fruit lesions at stem end with dark, sunken areas',
-                'Premature defoliation',
-                'Reduced plant vigor and yield'
-            ],
-            'remedies': [
-                'Apply Mancozeb 75% WP @ 2.5g/L water',
-                'Spray Chlorothalonil 75% WP @ 2g/L water',
-                'Use Azoxystrobin 23% SC @ 1ml/L water',
-                'Apply Propiconazole 25% EC @ 1ml/L water',
-                'Alternate fungicide sprays every 10-14 days',
-                'Remove lower leaves touching ground',
-                'Improve air circulation around plants',
-                'Apply protective fungicides preventively'
-            ],
-            'prevention': [
-                'Use resistant varieties like Mountain Fresh Plus',
-                'Ensure excellent air circulation between plants',
-                'Water at soil level, avoid wetting foliage',
-                'Apply balanced fertilizer, avoid excess nitrogen',
-                'Mulch around plants to reduce soil splash',
-                'Practice crop rotation with non-host crops',
-                'Remove crop debris after harvest',
-                'Start plants from disease-free seeds or transplants'
-            ],
-            'organic_remedies': [
-                'Weekly compost tea applications',
-                'Milk spray @ 1:10 ratio with water',
-                'Trichoderma viride soil application',
-                'Potassium bicarbonate spray @ 5g/L water',
-                'Calcium chloride foliar spray',
-                'Neem oil applications',
-                'Copper-based organic fungicides'
-            ]
-        },
-        
-        'Tomato_Late_blight': {
-            'type': 'Oomycete Disease',
-            'pathogen': 'Phytophthora infestans',
-            'severity': 'Very High',
-            'economic_impact': 'Can cause 100% crop loss in favorable conditions',
-            'description': 'Late blight is a devastating disease that can destroy entire tomato crops rapidly.',
-            'symptoms': [
-                'Water-soaked lesions on leaves',
-                'White fuzzy growth on leaf undersides in humid conditions',
-                'Brown to black lesions spreading rapidly',
-                'Affected fruits show brown, greasy lesions',
-                'Complete plant collapse in severe cases',
-                'Distinctive musty odor from infected plants',
-                'Dark stem lesions and blackening',
-                'Rapid disease progression under favorable conditions'
-            ],
-            'remedies': [
-                'Apply Metalaxyl + Mancozeb @ 2.5g/L water',
-                'Spray Dimethomorph 50% WP @ 1.5g/L water',
-                'Use Copper oxychloride 50% WP @ 3g/L water',
-                'Apply Fosetyl aluminum @ 2.5g/L water',
-                'Emergency spraying during disease outbreak',
-                'Remove infected plants immediately',
-                'Improve air circulation and drainage',
-                'Apply protective fungicides preventively'
-            ],
-            'prevention': [
-                'Plant resistant varieties like Mountain Magic',
-                'Ensure excellent air circulation',
-                'Never use overhead watering',
-                'Remove infected plants immediately and destroy',
-                'Apply preventive copper sprays in humid conditions',
-                'Monitor weather for blight-favorable conditions',
-                'Use certified disease-free plants',
-                'Implement proper sanitation practices'
-            ],
-            'organic_remedies': [
-                'Bordeaux mixture application @ 1% concentration',
-                'Copper soap spray during preventive periods',
-                'Remove and burn infected plant parts immediately',
-                'Improve drainage around plants',
-                'Beneficial microorganism soil amendments',
-                'Milk spray for early prevention',
-                'Baking soda solutions'
-            ]
-        },
-        
-        'Tomato_Leaf_Mold': {
-            'type': 'Fungal Disease',
-            'pathogen': 'Passalora fulva',
-            'severity': 'Medium',
-            'economic_impact': 'Yield reduction of 10-25%',
-            'description': 'Leaf mold primarily affects greenhouse tomatoes causing yellowing and defoliation.',
-            'symptoms': [
-                'Yellow patches on upper leaf surfaces',
-                'Olive-green to brown fuzzy growth on undersides',
-                'Progressive yellowing and browning of leaves',
-                'Lower leaves affected first',
-                'Defoliation in severe cases',
-                'Reduced fruit quality and yield',
-                'Velvet-like fungal growth on leaf undersides',
-                'Premature aging of affected plants'
-            ],
-            'remedies': [
-                'Improve ventilation and reduce humidity',
-                'Apply Chlorothalonil @ 2g/L water',
-                'Use Mancozeb @ 2.5g/L water',
-                'Remove affected leaves immediately',
-                'Increase spacing between plants',
-                'Apply copper-based fungicides',
-                'Improve air circulation in growing areas',
-                'Reduce leaf wetness duration'
-            ],
-            'prevention': [
-                'Maintain humidity below 85%',
-                'Ensure good air circulation',
-                'Use resistant varieties',
-                'Avoid overhead watering',
-                'Remove crop debris promptly',
-                'Proper greenhouse ventilation',
-                'Monitor and control humidity levels',
-                'Adequate plant spacing'
-            ],
-            'organic_remedies': [
-                'Sulfur spray @ 3g/L water',
-                'Baking soda solution @ 5g/L water',
-                'Milk spray @ 1:10 ratio',
-                'Compost tea applications',
-                'Beneficial microorganism sprays',
-                'Copper soap fungicides',
-                'Essential oil treatments'
-            ]
-        },
-        
-        'Potato___Early_blight': {
-            'type': 'Fungal Disease',
-            'pathogen': 'Alternaria solani',
-            'severity': 'Medium',
-            'economic_impact': 'Yield reductions of 15-30% common',
-            'description': 'Early blight affects potato foliage and tubers, causing significant yield reductions.',
-            'symptoms': [
-                'Circular brown lesions with concentric rings',
-                'Target-like patterns on leaves',
-                'Yellow halos around lesions',
-                'Premature defoliation',
-                'Dark, sunken lesions on tubers',
-                'Reduced photosynthetic capacity',
-                'Lower leaves affected first',
-                'Progressive upward movement of disease'
-            ],
-            'remedies': [
-                'Apply Mancozeb 75% WP @ 2.5g/L water',
-                'Use Chlorothalonil @ 2g/L water',
-                'Spray Azoxystrobin @ 1ml/L water',
-                'Apply protective fungicides preventively',
-                'Remove affected foliage',
-                'Ensure proper field drainage',
-                'Rotate fungicide modes of action',
-                'Time applications based on weather conditions'
-            ],
-            'prevention': [
-                'Plant certified disease-free seed potatoes',
-                'Practice 3-4 year crop rotation',
-                'Avoid overhead irrigation systems',
-                'Maintain proper plant nutrition',
-                'Remove volunteer potato plants',
-                'Hill soil around plants properly',
-                'Implement proper field sanitation',
-                'Monitor weather for infection periods'
-            ],
-            'organic_remedies': [
-                'Copper-based organic fungicides',
-                'Compost tea applications',
-                'Beneficial microorganism inoculants',
-                'Proper crop residue management',
-                'Neem oil treatments',
-                'Baking soda sprays',
-                'Milk applications'
-            ]
-        },
-        
-        'Potato___Late_blight': {
-            'type': 'Oomycete Disease',
-            'pathogen': 'Phytophthora infestans',
-            'severity': 'Very High',
-            'economic_impact': 'Can destroy entire crops within days',
-            'description': 'Late blight is historically significant, causing the Irish Potato Famine.',
-            'symptoms': [
-                'Water-soaked lesions on leaves',
-                'White mold growth on undersides',
-                'Rapid blackening and death of foliage',
-                'Brown, dry lesions on tubers',
-                'Foul odor from secondary bacterial infection',
-                'Complete field destruction possible',
-                'Dark, greasy lesions spreading rapidly',
-                'Plant collapse under favorable conditions'
-            ],
-            'remedies': [
-                'Apply Metalaxyl-M + Mancozeb @ 2.5g/L',
-                'Use Dimethomorph @ 1.5g/L water',
-                'Spray copper-based fungicides',
-                'Emergency applications during outbreaks',
-                'Destroy infected plants immediately',
-                'Avoid harvesting infected tubers',
-                'Improve field drainage',
-                'Apply protective fungicides preventively'
-            ],
-            'prevention': [
-                'Use certified seed potatoes',
-                'Plant resistant varieties',
-                'Monitor weather conditions closely',
-                'Avoid overhead irrigation',
-                'Practice proper field sanitation',
-                'Time planting to avoid favorable conditions',
-                'Implement area-wide management',
-                'Remove volunteer plants'
-            ],
-            'organic_remedies': [
-                'Copper sulfate applications',
-                'Bordeaux mixture spray',
-                'Immediate removal of infected plants',
-                'Improve air circulation',
-                'Beneficial microorganism applications',
-                'Proper cultural practices',
-                'Enhanced drainage'
-            ]
-        },
-        
-        'Potato___healthy': {
-            'type': 'Healthy Plant',
-            'severity': 'N/A (Healthy)',
-            'economic_impact': 'Positive - healthy plants produce maximum yield',
-            'description': 'Potato plant shows healthy growth with no disease symptoms.',
-            'symptoms': [
-                'Vigorous green foliage with normal coloration',
-                'Strong, upright plant structure',
-                'Normal leaf size and shape',
-                'No visible lesions or discoloration',
-                'Healthy root and tuber development',
-                'Good plant vigor throughout growing season'
-            ],
-            'maintenance': [
-                'Maintain consistent soil moisture',
-                'Hill soil around plants as they grow',
-                'Monitor for pest and disease symptoms',
-                'Apply appropriate fertilizers based on soil test',
-                'Ensure proper field sanitation',
-                'Continue good cultural practices'
-            ],
-            'prevention': [
-                'Continue current excellent management',
-                'Regular monitoring for early symptoms',
-                'Maintain proper nutrition program',
-                'Good field hygiene practices',
-                'Preventive disease management'
-            ]
-        },
-        
-        'Tomato_healthy': {
-            'type': 'Healthy Plant',
-            'severity': 'N/A (Healthy)',
-            'economic_impact': 'Positive - healthy plants produce maximum yield',
-            'description': 'Tomato plant appears healthy with vibrant green foliage and no disease symptoms.',
-            'symptoms': [
-                'Vibrant green leaves with uniform coloration',
-                'Strong, sturdy plant structure',
-                'Normal leaf size and shape for variety',
-                'No visible lesions, spots, or discoloration',
-                'Healthy fruit development and ripening',
-                'Good overall plant vigor and growth'
-            ],
-            'maintenance': [
-                'Continue regular watering schedule (1-2 inches per week)',
-                'Apply balanced fertilizer every 2-3 weeks',
-                'Monitor for early disease symptoms',
-                'Maintain proper staking and pruning',
-                'Keep garden area clean from debris',
-                'Continue current excellent practices'
-            ],
-            'prevention': [
-                'Continue healthy growing practices',
-                'Regular monitoring for early symptoms',
-                'Proper nutrition and watering',
-                'Good garden hygiene',
-                'Preventive organic sprays if needed'
-            ]
-        }
-    }
-    
-    # Return disease information based on classification
-    if model_type == 'fruit':
-        return fruit_diseases.get(disease_class, {
-            'type': 'Unknown Classification',
-            'severity': 'Requires Investigation',
-            'description': f'The classification "{disease_class}" is not recognized in the disease database.',
-            'symptoms': [
-                f'AI classified this as "{disease_class}" with {confidence:.1%} confidence',
-                'This classification is not in the trained apple disease categories',
-                'Expected: Apple Black Rot, Apple Cedar Rust, Apple Scab, Apple Healthy, or generic Apple/Mango detection'
-            ],
-            'remedies': [
-                'Verify the fruit_classes.json mapping file contains correct disease names',
-                'Check that the model was trained for disease classification, not general fruit classification',
-                'Upload a clearer image showing disease symptoms or healthy tissue',
-                'Consult agricultural experts for proper disease identification'
-            ],
-            'prevention': [
-                'Use proper disease classification models trained on apple diseases',
-                'Ensure mapping files match the model training classes',
-                'Upload high-quality images with clear disease symptoms'
-            ]
-        })
-    
-    elif model_type == 'leaf':
-        return leaf_diseases.get(disease_class, {
-            'type': 'Unknown Disease',
-            'severity': 'Unknown',
-            'description': 'Disease information not available in the leaf disease database.',
-            'symptoms': ['Consult agricultural expert for proper identification'],
-            'remedies': ['Seek professional agricultural consultation'],
-            'prevention': ['Follow general crop protection practices']
-        })
-    
-    # Default fallback
-    return {
-        'type': 'Unknown Disease',
-        'severity': 'Unknown',
-        'description': 'Disease information not available in database.',
-        'symptoms': ['Consult agricultural expert for proper identification'],
-        'remedies': ['Seek professional agricultural consultation'],
-        'prevention': ['Follow general crop protection practices']
-    }
+    with ThreadPoolExecutor(max_workers=len(MODEL_SOURCES)) as executor:
+        list(executor.map(load_single_model, MODEL_SOURCES))
+
+    if SERVING_MODE == 'async':
+        start_async_server()
+
+def start_async_server():
+    """Route prediction requests through the asyncio admission queues instead of the batchers"""
+    global async_server
+    if async_server is not None:
+        return
+    async_server = AsyncInferenceServer(
+        {model_key: (lambda batch, model_key=model_key: models[model_key].predict(batch, verbose=0))
+         for model_key in models},
+        max_queue_size=ASYNC_MAX_QUEUE_SIZE,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+        retry_after_seconds=RETRY_AFTER_SECONDS,
+        concurrency=worker_pool.num_workers if worker_pool is not None else 1
+    )
+    async_server.start()
+
+def run_inference_concurrently(inputs):
+    """Submit one input batch per model at the same time, returns {model_type: (rows, timings)}"""
+    if async_server is not None:
+        futures = {model_type: async_server.submit(model_type, batch, REQUEST_DEADLINE_SECONDS) for model_type, batch in inputs.items()}
+        try:
+            return {model_type: future.result(timeout=REQUEST_DEADLINE_SECONDS) for model_type, future in futures.items()}
+        except FutureTimeoutError:
+            for future in futures.values():
+                future.cancel()
+            raise DeadlineExceededError(f"Inference did not finish within {REQUEST_DEADLINE_SECONDS}s")
+    futures = {model_type: batchers[model_type].submit(batch) for model_type, batch in inputs.items()}
+    return {model_type: (future.result(), None) for model_type, future in futures.items()}
+
+def accepts_encoded_bytes(model_type):
+    """True when the model's serving graph decodes and resizes images itself"""
+    return getattr(models.get(model_type), 'accepts_bytes', False)
+
+def build_model_inputs(model_types, image_bytes):
+    """Build each model's input for one upload, decoding in Python at most once"""
+    inputs = {}
+    processed_image = None
+    for model_type in model_types:
+        if accepts_encoded_bytes(model_type):
+            inputs[model_type] = np.array([image_bytes], dtype=object)
+        else:
+            if processed_image is None:
+                processed_image = preprocess_image(image_bytes)
+            inputs[model_type] = processed_image
+    return inputs
+
+def start_model_loading():
+    """Load models in the background so /ready can report progress while the server is already up"""
+    thread = threading.Thread(target=load_models, name='model-loader', daemon=True)
+    thread.start()
+    return thread
+
+def start_batcher(model_type):
+    """Put a micro-batching scheduler in front of a loaded model"""
+    if model_type in batchers:
+        return
+    batchers[model_type] = MicroBatcher(
+        model_type,
+        lambda batch: models[model_type].predict(batch, verbose=0),
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+        concurrency=worker_pool.num_workers if worker_pool is not None else 1
+    )
+    logger.info(f"Batching enabled for {model_type}: max {BATCH_MAX_SIZE} images / {BATCH_MAX_WAIT_MS}ms")
+
+def init_database():
+    """Bring the SQLite schema up to date with the versioned migrations"""
+    with db_pool.connection() as conn:
+        applied = migrations.migrate(conn)
+        logger.info(f"Database schema at version {migrations.schema_version(conn)} ({len(applied)} migrations applied)")
+
+def encode_history_cursor(timestamp, prediction_id):
+    return f"{timestamp}|{prediction_id}"
+
+def decode_history_cursor(value):
+    """Parse a 'timestamp|id' cursor; raises ValueError if malformed"""
+    timestamp, prediction_id = value.rsplit('|', 1)
+    return timestamp, int(prediction_id)
+
+def load_knowledge_base():
+    """Load the disease data file; without it every class falls back to the generic entry"""
+    try:
+        disease_knowledge.load(DISEASE_DATA_PATH)
+    except Exception as e:
+        logger.error(f"Error loading disease knowledge base: {e}")
+
+load_knowledge_base()
+
+def prediction_json(result, disease_info_json):
+    """Serialize a prediction and splice in the pre-serialized disease_info bytes"""
+    body = fast_json.dumps(result)
+    return body[:-1] + b',"disease_info":' + disease_info_json + b'}'
+
+def disease_info_url(model_type, disease_class, etag):
+    return f"/disease/{quote(model_type)}/{quote(disease_class)}?v={etag}"
+
+def render_prediction(result, knowledge, slim=False):
+    """Serialize a prediction with its full disease_info, or in slim mode with a cacheable reference to it"""
+    model_type = result['model_type']
+    predicted_class = result['predicted_class']
+    etag = knowledge.etags.get((model_type, predicted_class))
+    if slim and etag is not None:
+        result['disease_info_url'] = disease_info_url(model_type, predicted_class, etag)
+        return fast_json.dumps(result)
+    # Unknown classes have no shared entry to reference, so they stay inline
+    return prediction_json(result, knowledge.get_disease_info_json(predicted_class, model_type, result['confidence']))
+
+def wants_slim_response():
+    return request.values.get('view') == 'slim'
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def preprocess_image(img_path):
-    """Preprocess image for model prediction"""
+def preprocess_image(img_source):
+    """Preprocess image for model prediction from a file path or raw encoded bytes.
+
+    Models served through the 'savedmodel' backend skip this and receive the encoded bytes.
+    """
     try:
-        img = image.load_img(img_path, target_size=(224, 224))
+        img = decode_image(img_source, target_size=(224, 224), draft=DECODE_JPEG_DRAFT)
         img_array = image.img_to_array(img)
         img_array = img_array / 255.0
         img_array = np.expand_dims(img_array, axis=0)
@@ -973,28 +492,128 @@ def preprocess_image(img_path):
         logger.error(f"Error preprocessing image: {e}")
         raise
 
+def archive_upload(image_bytes, filename):
+    """Write the raw upload to UPLOAD_FOLDER when archiving is enabled"""
+    try:
+        with open(os.path.join(UPLOAD_FOLDER, filename), 'wb') as f:
+            f.write(image_bytes)
+    except Exception as e:
+        logger.warning(f"Failed to archive upload: {e}")
+
+def insert_predictions(cursor, rows):
+    """Insert (id, timestamp, model_type, predicted_class, confidence, class_index, filename, user_ip) rows"""
+    cursor.executemany('''
+        INSERT INTO predictions (id, timestamp, model_type, predicted_class, confidence, class_index, filename, user_ip)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    prediction_stats.record_predictions(cursor, [(row[2], row[3], row[4], row[7]) for row in rows])
+    rollups.record_predictions(cursor, [(row[1], row[2], row[3], row[4]) for row in rows])
+
+def write_predictions(cursor, records):
+    """Insert (model_type, predicted_class, confidence, class_index, filename, user_ip) records, returns their ids"""
+    timestamp = datetime.now(timezone.utc).strftime(rollups.TIMESTAMP_FORMAT)
+    prediction_ids = []
+    for record in records:
+        cursor.execute('''
+            INSERT INTO predictions (timestamp, model_type, predicted_class, confidence, class_index, filename, user_ip)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (timestamp, *record))
+        prediction_ids.append(cursor.lastrowid)
+    prediction_stats.record_predictions(cursor, [(record[0], record[1], record[2], record[5]) for record in records])
+    rollups.record_predictions(cursor, [(timestamp, record[0], record[1], record[2]) for record in records])
+    return prediction_ids
+
+def start_rollup_compactor():
+    global rollup_compactor
+    rollup_compactor = RollupCompactor(db_pool, ROLLUP_HOURLY_RETENTION_HOURS, ROLLUP_COMPACT_INTERVAL_SECONDS)
+    rollup_compactor.start()
+
+def start_partition_archiver():
+    global partition_archiver
+    partition_archiver = PartitionArchiver(partition_store, PARTITION_ARCHIVE_INTERVAL_SECONDS)
+    partition_archiver.start()
+
+def start_prediction_writer():
+    global prediction_writer
+    prediction_writer = PredictionWriter(
+        db_pool, insert_predictions,
+        max_queue_size=WRITE_BEHIND_MAX_QUEUE,
+        flush_size=WRITE_BEHIND_FLUSH_SIZE,
+        flush_interval_ms=WRITE_BEHIND_FLUSH_MS
+    )
+    prediction_writer.start()
+
 def save_prediction_to_db(model_type, predicted_class, confidence, class_index, filename, user_ip):
     """Save prediction to database"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO predictions (model_type, predicted_class, confidence, class_index, filename, user_ip)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (model_type, predicted_class, confidence, class_index, filename, user_ip))
-        prediction_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        if prediction_writer is not None:
+            return prediction_writer.submit((model_type, predicted_class, confidence, class_index, filename, user_ip))
+        with db_pool.connection() as conn:
+            prediction_id, = write_predictions(conn.cursor(), [(model_type, predicted_class, confidence, class_index, filename, user_ip)])
+            conn.commit()
         return prediction_id
     except Exception as e:
         logger.error(f"Error saving prediction: {e}")
         return None
 
+def save_predictions_to_db(records):
+    """Save several predictions in a single transaction, returns their ids in order"""
+    try:
+        if prediction_writer is not None:
+            # Rows already queued keep their ids even if the queue fills part way through
+            return prediction_writer.submit_many(records)
+        with db_pool.connection() as conn:
+            prediction_ids = write_predictions(conn.cursor(), records)
+            conn.commit()
+        return prediction_ids
+    except Exception as e:
+        logger.error(f"Error saving predictions: {e}")
+        return [None] * len(records)
+
+def collect_bulk_uploads(files):
+    """Expand the uploaded parts of a bulk request into (filename, bytes) pairs, unpacking zip archives.
+
+    Raises UploadRejected (413) before decompressing anything if the archives hold more than
+    BULK_MAX_IMAGES images or would expand to more than MAX_ARCHIVE_BYTES.
+    """
+    uploads = []
+    expanded_bytes = 0
+    for file in files:
+        if file.filename == '':
+            continue
+        if file.filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(file.read())) as archive:
+                members = [member for member in archive.infolist()
+                           if not member.is_dir() and allowed_file(member.filename)]
+                # Declared sizes bound what archive.read() will return, so check them up front
+                expanded_bytes += sum(member.file_size for member in members if member.file_size <= MAX_UPLOAD_BYTES)
+                if len(uploads) + len(members) > BULK_MAX_IMAGES:
+                    raise UploadRejected(f'Too many images, maximum is {BULK_MAX_IMAGES}', 413)
+                if expanded_bytes > MAX_ARCHIVE_BYTES:
+                    raise UploadRejected(f'Archive expands to more than {MAX_ARCHIVE_BYTES // (1024 * 1024)} MB', 413)
+                for member in members:
+                    if member.file_size > MAX_UPLOAD_BYTES:
+                        # Reported per image by the caller instead of being decompressed
+                        uploads.append((os.path.basename(member.filename), None))
+                        continue
+                    uploads.append((os.path.basename(member.filename), archive.read(member)))
+        else:
+            uploads.append((file.filename, file.read()))
+    return uploads
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': e.description or 'Upload too large'}), 413
+
+@app.errorhandler(415)
+def unsupported_upload(e):
+    return jsonify({'error': e.description or 'Unsupported upload type'}), 415
+
 @app.route('/')
 def index():
     return jsonify({
         "message": "CropGuard AI - Multi-Crop Disease Detection API v3.0",
-        "models_loaded": {k: v is not None for k, v in models.items()},
+        "models_loaded": {k: models.get(k) is not None for k in MODEL_SOURCES},
         "total_classes": {k: len(v) for k, v in class_mappings.items()},
         "supported_diseases": {
             "fruit_model": ["Apple Black Rot", "Apple Cedar Rust", "Apple Scab", "Apple Healthy"],
@@ -1013,12 +632,24 @@ def predict():
         return jsonify({'error': 'No image file provided'}), 400
     
     if 'model_type' not in request.form:
-        return jsonify({'error': 'Model type not specified (fruit/leaf)'}), 400
+        return jsonify({'error': 'Model type not specified (fruit/leaf/auto)'}), 400
     
     model_type = request.form['model_type']
     
-    if model_type not in models or models[model_type] is None:
-        return jsonify({'error': f'{model_type} model not available'}), 400
+    if model_type == 'auto':
+        # Score the image with every available model and keep the best-supported answer
+        candidates = [name for name in MODEL_SOURCES if models.get(name) is not None]
+        if not candidates:
+            if any(status['state'] in ('loading', 'warming') for status in model_status.values()):
+                return jsonify({'error': 'Models are still loading'}), 503
+            return jsonify({'error': 'No model available'}), 400
+    else:
+        if model_status.get(model_type, {}).get('state') in ('loading', 'warming'):
+            return jsonify({'error': f'{model_type} model is still loading'}), 503
+        
+        if model_type not in MODEL_SOURCES or models.get(model_type) is None:
+            return jsonify({'error': f'{model_type} model not available'}), 400
+        candidates = [model_type]
     
     file = request.files['image']
     
@@ -1030,22 +661,46 @@ def predict():
     
     file_extension = file.filename.rsplit('.', 1)[1].lower()
     unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
     
     try:
-        file.save(filepath)
+        image_bytes = file.read()
+        validate_image(image_bytes, MAX_IMAGE_PIXELS)
+        if ARCHIVE_UPLOADS:
+            archive_upload(image_bytes, unique_filename)
+        
+        outcomes = {}
+        misses = {}
+        for candidate in candidates:
+            key = cache_key(image_bytes, candidate, model_versions.get(candidate))
+            hit = prediction_cache.get(key)
+            if hit is not None:
+                outcomes[candidate] = (*hit, True)
+            else:
+                misses[candidate] = key
+        
+        timings = {}
+        stages = {}
+        if misses:
+            # Decode and preprocess once, however many models score the image
+            inputs = build_model_inputs(misses, image_bytes)
+            for candidate, (predictions, timing, stage) in run_cascade(inputs).items():
+                index = int(np.argmax(predictions[0]))
+                outcomes[candidate] = (index, float(predictions[0][index]), False)
+                prediction_cache.put(misses[candidate], index, outcomes[candidate][1])
+                timings[candidate] = timing
+                stages[candidate] = str(stage[0])
         
-        processed_image = preprocess_image(filepath)
-        predictions = models[model_type].predict(processed_image, verbose=0)
-        predicted_class_index = np.argmax(predictions[0])
-        confidence = float(predictions[0][predicted_class_index])
+        requested_model_type = model_type
+        model_type = max(outcomes, key=lambda candidate: outcomes[candidate][1])
+        predicted_class_index, confidence, cached = outcomes[model_type]
+        timing = timings.get(model_type)
         
         predicted_class = class_mappings[model_type].get(
             predicted_class_index, 
             f"Unknown_Class_{predicted_class_index}"
         )
         
-        disease_info = get_comprehensive_disease_info(predicted_class, model_type, confidence)
+        knowledge = disease_knowledge.current()
         
         user_ip = request.remote_addr or 'unknown'
         prediction_id = save_prediction_to_db(
@@ -1058,24 +713,188 @@ def predict():
             'model_type': model_type,
             'predicted_class': predicted_class,
             'confidence': confidence,
-            'class_index': int(predicted_class_index),
-            'timestamp': datetime.now().isoformat(),
-            'disease_info': disease_info
+            'class_index': predicted_class_index,
+            'cached': cached,
+            'knowledge_version': knowledge.version,
+            'timestamp': datetime.now().isoformat()
         }
+        if timing is not None:
+            result['timing'] = timing
+        if model_type in stages:
+            result['stage'] = stages[model_type]
+        if requested_model_type == 'auto':
+            result['requested_model_type'] = 'auto'
+            result['model_scores'] = {
+                candidate: {
+                    'predicted_class': class_mappings[candidate].get(index, f"Unknown_Class_{index}"),
+                    'confidence': score,
+                    'class_index': index
+                }
+                for candidate, (index, score, _) in outcomes.items()
+            }
         
-        logger.info(f"{model_type} prediction: {predicted_class} with confidence {confidence:.4f}")
-        return jsonify(result)
+        logger.info(f"{model_type} prediction ({stages.get(model_type, 'cache')}): {predicted_class} with confidence {confidence:.4f}")
+        return Response(render_prediction(result, knowledge, wants_slim_response()), mimetype='application/json')
         
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    
+    except DeadlineExceededError as e:
+        return jsonify({'error': str(e)}), 504
+    
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Run many images through inference in batches, streaming one JSON line per image"""
+    files = request.files.getlist('images') + request.files.getlist('archive')
+    if not files:
+        return jsonify({'error': 'No image files provided'}), 400
     
-    finally:
-        try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        except Exception as e:
-            logger.warning(f"Failed to delete file: {e}")
+    if 'model_type' not in request.form:
+        return jsonify({'error': 'Model type not specified (fruit/leaf)'}), 400
+    
+    model_type = request.form['model_type']
+    
+    if model_status.get(model_type, {}).get('state') in ('loading', 'warming'):
+        return jsonify({'error': f'{model_type} model is still loading'}), 503
+    
+    if model_type not in MODEL_SOURCES or models.get(model_type) is None:
+        return jsonify({'error': f'{model_type} model not available'}), 400
+    
+    try:
+        uploads = collect_bulk_uploads(files)
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid zip archive'}), 400
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    
+    if not uploads:
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if len(uploads) > BULK_MAX_IMAGES:
+        return jsonify({'error': f'Too many images, maximum is {BULK_MAX_IMAGES}'}), 400
+    
+    user_ip = request.remote_addr or 'unknown'
+    slim = wants_slim_response()
+    
+    def generate():
+        model_version = model_versions.get(model_type)
+        for start in range(0, len(uploads), BATCH_MAX_SIZE):
+            chunk = list(enumerate(uploads[start:start + BATCH_MAX_SIZE], start))
+            
+            outcomes = {}
+            pending = []
+            for index, (filename, image_bytes) in chunk:
+                if not allowed_file(filename):
+                    yield fast_json.dumps({'index': index, 'filename': filename, 'error': 'Invalid file type'}) + b'\n'
+                    continue
+                if image_bytes is None:
+                    yield fast_json.dumps({'index': index, 'filename': filename, 'error': 'File too large'}) + b'\n'
+                    continue
+                try:
+                    validate_image(image_bytes, MAX_IMAGE_PIXELS)
+                except UploadRejected as e:
+                    yield fast_json.dumps({'index': index, 'filename': filename, 'error': str(e)}) + b'\n'
+                    continue
+                key = cache_key(image_bytes, model_type, model_version)
+                cached = prediction_cache.get(key)
+                if cached is not None:
+                    outcomes[index] = (*cached, True, None)
+                    continue
+                try:
+                    pending.append((index, key, build_model_inputs([model_type], image_bytes)[model_type]))
+                except Exception as e:
+                    yield fast_json.dumps({'index': index, 'filename': filename, 'error': f'Preprocessing failed: {str(e)}'}) + b'\n'
+            
+            if pending:
+                try:
+                    predictions, _, stages = run_cascade({model_type: np.concatenate([item[2] for item in pending], axis=0)})[model_type]
+                except Exception as e:
+                    logger.error(f"Bulk prediction error: {e}")
+                    for index, _, _ in pending:
+                        yield fast_json.dumps({'index': index, 'filename': uploads[index][0], 'error': f'Prediction failed: {str(e)}'}) + b'\n'
+                    predictions, stages = [], []
+                
+                for (index, key, _), row, stage in zip(pending, predictions, stages):
+                    predicted_class_index = int(np.argmax(row))
+                    confidence = float(row[predicted_class_index])
+                    prediction_cache.put(key, predicted_class_index, confidence)
+                    outcomes[index] = (predicted_class_index, confidence, False, str(stage))
+            
+            if not outcomes:
+                continue
+            
+            knowledge = disease_knowledge.current()
+            results = []
+            records = []
+            for index, (filename, image_bytes) in chunk:
+                if index not in outcomes:
+                    continue
+                predicted_class_index, confidence, cached, stage = outcomes[index]
+                predicted_class = class_mappings[model_type].get(
+                    predicted_class_index,
+                    f"Unknown_Class_{predicted_class_index}"
+                )
+                unique_filename = f"{uuid.uuid4()}.{filename.rsplit('.', 1)[1].lower()}"
+                if ARCHIVE_UPLOADS:
+                    archive_upload(image_bytes, unique_filename)
+                
+                records.append((model_type, predicted_class, confidence, predicted_class_index, unique_filename, user_ip))
+                results.append({
+                    'index': index,
+                    'filename': filename,
+                    'model_type': model_type,
+                    'predicted_class': predicted_class,
+                    'confidence': confidence,
+                    'class_index': predicted_class_index,
+                    'cached': cached,
+                    'stage': stage,
+                    'knowledge_version': knowledge.version,
+                    'timestamp': datetime.now().isoformat()
+                })
+            
+            for result, prediction_id in zip(results, save_predictions_to_db(records)):
+                result['prediction_id'] = prediction_id
+                yield render_prediction(result, knowledge, slim) + b'\n'
+        
+        logger.info(f"{model_type} bulk prediction: {len(uploads)} images")
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/disease/<model_type>/<disease_class>', methods=['GET'])
+def get_disease(model_type, disease_class):
+    """Serve one knowledge base entry with a strong ETag so clients and CDNs can cache it"""
+    knowledge = disease_knowledge.current()
+    key = (model_type, disease_class)
+    if key not in knowledge.encoded:
+        return jsonify({'error': 'Disease not found'}), 404
+    
+    etag = knowledge.etags[key]
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2), so W/"..." from an intermediary still matches
+    matched = next((tag for tag in etag_variants(etag) if request.if_none_match.contains_weak(tag)), None)
+    if matched is not None:
+        # Echo the validator the client holds, including the per-encoding suffix compression added
+        response = Response(status=304)
+        response.set_etag(matched)
+        response.vary.add('Accept-Encoding')
+    else:
+        response = Response(knowledge.encoded[key], mimetype='application/json')
+        response.set_etag(etag)
+    if request.args.get('v') == etag:
+        # Versioned URLs never change content: a new version gets a new URL
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = f'public, max-age={DISEASE_CACHE_MAX_AGE}'
+    response.headers['X-Knowledge-Version'] = knowledge.version
+    return response
 
 @app.route('/feedback', methods=['POST'])
 def submit_feedback():
@@ -1090,25 +909,30 @@ def submit_feedback():
         rating = data['rating']
         is_correct = data['is_correct']
         comment = data.get('comment', '')
+        actual_class = data.get('actual_class')  # Optional: the true class when the prediction was wrong
         
         if not (1 <= rating <= 5):
             return jsonify({'error': 'Rating must be between 1 and 5'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT id FROM predictions WHERE id = ?', (prediction_id,))
-        if not cursor.fetchone():
-            conn.close()
-            return jsonify({'error': 'Prediction not found'}), 404
+        if prediction_writer is not None and isinstance(prediction_id, int) and prediction_writer.pending(prediction_id):
+            # The prediction may still be queued for write-behind
+            prediction_writer.wait_for(prediction_id)
         
-        cursor.execute('''
-            INSERT INTO feedback (prediction_id, rating, is_correct, comment)
-            VALUES (?, ?, ?, ?)
-        ''', (prediction_id, rating, is_correct, comment))
-        
-        conn.commit()
-        conn.close()
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Falls back to the monthly archives for predictions that have left the main table
+            prediction = partition_store.find(conn, prediction_id)
+            if not prediction:
+                return jsonify({'error': 'Prediction not found'}), 404
+            
+            cursor.execute('''
+                INSERT INTO feedback (prediction_id, rating, is_correct, comment, actual_class)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (prediction_id, rating, is_correct, comment, actual_class))
+            feedback_stats.record_feedback(cursor, prediction[0], prediction[1], is_correct, rating, actual_class)
+            
+            conn.commit()
         
         return jsonify({'message': 'Feedback submitted successfully'})
         
@@ -1119,67 +943,54 @@ def submit_feedback():
 @app.route('/history', methods=['GET'])
 def get_prediction_history():
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
         limit = int(request.args.get('limit', 50))
         offset = int(request.args.get('offset', 0))
         model_filter = request.args.get('model_type', '')
+        page_cursor = request.args.get('cursor')
         
-        # Check what columns exist in the predictions table
-        cursor.execute("PRAGMA table_info(predictions)")
-        columns = [column[1] for column in cursor.fetchall()]
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit must be at least 1 and offset must not be negative'}), 400
         
-        # Build query based on available columns
-        select_fields = ['p.id', 'p.timestamp', 'p.predicted_class', 'p.confidence']
-        if 'model_type' in columns:
-            select_fields.append('p.model_type')
-        
-        select_clause = ', '.join(select_fields)
-        
-        query = f'''
-            SELECT {select_clause}, 
-                   f.rating, f.is_correct, f.comment
-            FROM predictions p
-            LEFT JOIN feedback f ON p.id = f.prediction_id
-        '''
-        params = []
-        
-        if model_filter and 'model_type' in columns:
-            query += ' WHERE p.model_type = ?'
-            params.append(model_filter)
-        
-        query += ' ORDER BY p.timestamp DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
+        before = None
+        if page_cursor:
+            # Keyset paging: seek past the last row the client saw instead of skipping OFFSET rows
+            try:
+                before = decode_history_cursor(page_cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            offset = 0
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        with db_pool.connection() as conn:
+            # Merges the main table with the monthly archives, opening only the months the page reaches
+            rows = partition_store.history_page(conn, limit, offset, model_filter or None, before)
+            feedback = {}
+            if rows:
+                marks = ','.join('?' * len(rows))
+                for prediction_id, rating, is_correct, comment in conn.execute(f'''
+                    SELECT prediction_id, rating, is_correct, comment FROM feedback
+                    WHERE prediction_id IN ({marks})
+                ''', [row[0] for row in rows]):
+                    feedback.setdefault(prediction_id, []).append((rating, is_correct, comment))
         
         history = []
-        for row in rows:
-            entry = {
-                'id': row[0],
-                'timestamp': row[1],
-                'predicted_class': row[2],
-                'confidence': row[3]
-            }
-            
-            idx = 4
-            if 'model_type' in columns:
-                entry['model_type'] = row[idx] or 'leaf'
-                idx += 1
-            else:
-                entry['model_type'] = 'leaf'
-            
-            # Add feedback data
-            entry['rating'] = row[idx]
-            entry['is_correct'] = row[idx + 1]
-            entry['comment'] = row[idx + 2]
-            
-            history.append(entry)
+        for prediction_id, timestamp, predicted_class, confidence, model_type in rows:
+            # One entry per feedback row, as the old LEFT JOIN returned
+            for rating, is_correct, comment in feedback.get(prediction_id, [(None, None, None)]):
+                history.append({
+                    'id': prediction_id,
+                    'timestamp': timestamp,
+                    'predicted_class': predicted_class,
+                    'confidence': confidence,
+                    'model_type': model_type or 'leaf',
+                    'rating': rating,
+                    'is_correct': is_correct,
+                    'comment': comment
+                })
         
-        conn.close()
-        return jsonify(history)
+        response = jsonify(history)
+        if len(rows) == limit and rows:
+            response.headers['X-Next-Cursor'] = encode_history_cursor(rows[-1][1], rows[-1][0])
+        return response
         
     except Exception as e:
         logger.error(f"Error getting history: {e}")
@@ -1188,29 +999,27 @@ def get_prediction_history():
 @app.route('/analytics', methods=['GET'])
 def get_analytics():
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # Overall stats
-        cursor.execute('SELECT COUNT(*) FROM predictions')
-        total_predictions = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT AVG(confidence) FROM predictions')
-        avg_confidence = cursor.fetchone()[0] or 0
-        
-        cursor.execute('SELECT COUNT(DISTINCT user_ip) FROM predictions')
-        total_users = cursor.fetchone()[0]
-        
-        conn.close()
+        # Running aggregates maintained by the insert path, not a scan of predictions
+        with db_pool.connection() as conn:
+            stats = prediction_stats.read(conn.cursor())
+            accuracy = feedback_stats.read(conn.cursor())
+        model_accuracy = {entry['model']: entry['accuracy'] for entry in accuracy['models']}
         
         analytics_data = {
-            'total_predictions': total_predictions,
-            'total_users': total_users,
-            'average_confidence': round(avg_confidence, 4),
+            'total_predictions': stats['total_predictions'],
+            'total_users': stats['total_users'],
+            'average_confidence': round(stats['average_confidence'], 4),
+            'model_distribution': stats['models'],
+            'class_distribution': stats['classes'],
+            'total_contacts': stats['total_contacts'],
+            # User-reported accuracy from feedback; None until a model has any
+            'user_reported_accuracy': accuracy['accuracy'],
+            'average_rating': accuracy['mean_rating'],
             'system_accuracy': {
-                'fruit_model': 99.77,
-                'leaf_model': 95.50
-            }
+                'fruit_model': model_accuracy.get('fruit'),
+                'leaf_model': model_accuracy.get('leaf')
+            },
+            'feedback': accuracy
         }
         
         return jsonify(analytics_data)
@@ -1219,6 +1028,55 @@ def get_analytics():
         logger.error(f"Error getting analytics: {e}")
         return jsonify({'error': 'Failed to retrieve analytics'}), 500
 
+def parse_trend_time(value, default):
+    """Accept 'YYYY-MM-DD' or an ISO datetime; returns a UTC 'YYYY-MM-DD HH:MM:SS' string"""
+    if not value:
+        return default.strftime(rollups.TIMESTAMP_FORMAT)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime(rollups.TIMESTAMP_FORMAT)
+
+@app.route('/analytics/trends', methods=['GET'])
+def get_trends():
+    """Prediction counts per hour or day from the rollup tables"""
+    try:
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in ('hour', 'day'):
+            return jsonify({'error': 'granularity must be "hour" or "day"'}), 400
+        
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        default_span = timedelta(hours=ROLLUP_HOURLY_RETENTION_HOURS) if granularity == 'hour' else timedelta(days=30)
+        try:
+            end = parse_trend_time(request.args.get('end'), now)
+            start = parse_trend_time(request.args.get('start'), datetime.strptime(end, rollups.TIMESTAMP_FORMAT) - default_span)
+        except ValueError:
+            return jsonify({'error': 'start and end must be ISO dates or datetimes'}), 400
+        if start > end:
+            return jsonify({'error': 'start must not be after end'}), 400
+        if datetime.strptime(end, rollups.TIMESTAMP_FORMAT) - datetime.strptime(start, rollups.TIMESTAMP_FORMAT) > timedelta(days=TRENDS_MAX_DAYS):
+            return jsonify({'error': f'Range is limited to {TRENDS_MAX_DAYS} days'}), 400
+        
+        started = time.perf_counter()
+        with db_pool.connection() as conn:
+            series = rollups.query_trends(
+                conn.cursor(), start, end, granularity,
+                request.args.get('model_type'), request.args.get('predicted_class')
+            )
+        
+        return jsonify({
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'hourly_retention_hours': ROLLUP_HOURLY_RETENTION_HOURS,
+            'series': series,
+            'query_ms': round((time.perf_counter() - started) * 1000, 2)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting trends: {e}")
+        return jsonify({'error': 'Failed to retrieve trends'}), 500
+
 @app.route('/contact', methods=['POST'])
 def submit_contact():
     try:
@@ -1234,14 +1092,14 @@ def submit_contact():
         message = data['message']
         
         # Save to database
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO contacts (name, email, subject, message)
-            VALUES (?, ?, ?, ?)
-        ''', (name, email, subject, message))
-        conn.commit()
-        conn.close()
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO contacts (name, email, subject, message)
+                VALUES (?, ?, ?, ?)
+            ''', (name, email, subject, message))
+            prediction_stats.record_contact(cursor)
+            conn.commit()
         
         # Send email notification
         try:
@@ -1271,24 +1129,13 @@ def submit_contact():
 def get_system_stats():
     """Get overall system statistics"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM predictions')
-        total_predictions = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT user_ip) FROM predictions')
-        total_users = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM contacts')
-        total_contacts = cursor.fetchone()[0]
-        
-        conn.close()
+        with db_pool.connection() as conn:
+            stats = prediction_stats.read(conn.cursor())
         
         return jsonify({
-            'total_predictions': total_predictions,
-            'total_users': total_users,
-            'total_contacts': total_contacts,
+            'total_predictions': stats['total_predictions'],
+            'total_users': stats['total_users'],
+            'total_contacts': stats['total_contacts'],
             'version': '3.0',
             'contact_email': CONTACT_EMAIL,
             'contact_whatsapp': WHATSAPP_NUMBER
@@ -1302,12 +1149,58 @@ def get_system_stats():
 def health_check():
     return jsonify({
         'status': 'healthy',
-        'models_loaded': {k: v is not None for k, v in models.items()},
+        'models_loaded': {k: models.get(k) is not None for k in MODEL_SOURCES},
+        'batching': {k: b.stats() for k, b in batchers.items()},
+        'cache': prediction_cache.stats(),
+        'worker_pool': worker_pool.stats() if worker_pool is not None else None,
+        'serving_mode': SERVING_MODE,
+        'async_serving': async_server.stats() if async_server is not None else None,
+        'cascade': cascade_stats if CASCADE_ENABLED else None,
+        'knowledge_version': disease_knowledge.current().version,
+        'json_encoder': fast_json.BACKEND,
+        'compression': response_compressor.stats(),
+        'database': db_pool.stats(),
+        'write_behind': prediction_writer.stats() if prediction_writer is not None else None,
+        'rollups': rollup_compactor.stats() if rollup_compactor is not None else None,
+        'partitions': partition_archiver.stats() if partition_archiver is not None else None,
         'timestamp': datetime.now().isoformat(),
         'version': '3.0'
     })
 
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the /stats, /analytics, trend and feedback accuracy aggregates from the raw tables and archives"""
+    init_database()
+    with db_pool.connection() as conn:
+        # The archiver can still copy rows into an archive meanwhile (only its deletes wait for this
+        # lock); iter_predictions skips archived ids that are still in main, so each row counts once
+        conn.execute('BEGIN IMMEDIATE')
+        prediction_stats.rebuild(conn.cursor(), partition_store.iter_predictions(
+            conn, 'model_type, predicted_class, confidence, user_ip'))
+        rollups.rebuild(conn.cursor(), partition_store.iter_predictions(
+            conn, 'timestamp, model_type, predicted_class, confidence'))
+        feedback_stats.rebuild(conn.cursor(), lambda ids: partition_store.lookup(conn, ids))
+        conn.commit()
+        stats = prediction_stats.read(conn.cursor())
+    print(f"Rebuilt aggregates: {stats['total_predictions']} predictions, ~{stats['total_users']} users")
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 only once no model is still loading or warming and at least one is serving"""
+    states = [status['state'] for status in model_status.values()]
+    ready = 'ready' in states and not any(state in ('loading', 'warming') for state in states)
+    return jsonify({
+        'ready': ready,
+        'models': model_status,
+        'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
+
 if __name__ == '__main__':
-    load_models()
+    disease_knowledge.start_watcher(DISEASE_RELOAD_INTERVAL_SECONDS)
+    start_model_loading()
     init_database()
+    if WRITE_BEHIND_ENABLED:
+        start_prediction_writer()
+    start_rollup_compactor()
+    start_partition_archiver()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """The admission queue for a model is full; the caller should retry later"""
+
+    def __init__(self, model_type, retry_after):
+        super().__init__(f"{model_type} inference queue is full")
+        self.model_type = model_type
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """A request was not served before its deadline"""
+
+
+class _Job:
+    __slots__ = ('inputs', 'deadline', 'enqueued_at', 'future')
+
+    def __init__(self, inputs, deadline):
+        self.inputs = inputs
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.future = Future()
+
+
+class AsyncInferenceServer:
+    """asyncio scheduler with a bounded admission queue per model, deadlines and load shedding"""
+
+    def __init__(self, predict_fns, max_queue_size=64, max_batch_size=16, max_wait_ms=5, retry_after_seconds=1, concurrency=1):
+        self.predict_fns = dict(predict_fns)
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.retry_after_seconds = retry_after_seconds
+        self.concurrency = concurrency
+
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency * len(self.predict_fns), thread_name_prefix='async-inference')
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._depth = {model_type: 0 for model_type in self.predict_fns}
+        self._counters = {
+            model_type: {'admitted': 0, 'rejected': 0, 'expired': 0, 'served': 0, 'queue_wait_ms': 0.0, 'inference_ms': 0.0}
+            for model_type in self.predict_fns
+        }
+        self._thread = threading.Thread(target=self._run_loop, name='async-inference-loop', daemon=True)
+        self._started = threading.Event()
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        logger.info(f"Async serving started: queue {self.max_queue_size}/model, batch {self.max_batch_size}")
+
+    def submit(self, model_type, inputs, timeout):
+        """Admit a request or raise QueueFullError immediately; returns a Future of (rows, timings)"""
+        with self._lock:
+            if self._depth[model_type] >= self.max_queue_size:
+                self._counters[model_type]['rejected'] += 1
+                raise QueueFullError(model_type, self.retry_after_seconds)
+            self._depth[model_type] += 1
+            self._counters[model_type]['admitted'] += 1
+
+        job = _Job(inputs, time.monotonic() + timeout)
+        self._loop.call_soon_threadsafe(self._queues[model_type].put_nowait, job)
+        return job.future
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for model_type, counters in self._counters.items():
+                served = counters['served']
+                result[model_type] = {
+                    'queue_depth': self._depth[model_type],
+                    'max_queue_size': self.max_queue_size,
+                    'admitted': counters['admitted'],
+                    'rejected': counters['rejected'],
+                    'expired': counters['expired'],
+                    'served': served,
+                    'avg_queue_wait_ms': round(counters['queue_wait_ms'] / served, 2) if served else 0,
+                    'avg_inference_ms': round(counters['inference_ms'] / served, 2) if served else 0
+                }
+            return result
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        for model_type in self.predict_fns:
+            self._queues[model_type] = asyncio.Queue()
+            for _ in range(self.concurrency):
+                self._loop.create_task(self._consume(model_type))
+        self._loop.call_soon(self._started.set)
+        self._loop.run_forever()
+
+    def _release(self, model_type, count):
+        with self._lock:
+            self._depth[model_type] -= count
+
+    def _live(self, model_type, job):
+        """Drop jobs whose caller has given up or whose deadline already passed"""
+        if job.future.cancelled() or time.monotonic() >= job.deadline:
+            self._release(model_type, 1)
+            with self._lock:
+                self._counters[model_type]['expired'] += 1
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(DeadlineExceededError('Request expired while queued'))
+            return False
+        return True
+
+    async def _consume(self, model_type):
+        queue = self._queues[model_type]
+        while True:
+            job = await queue.get()
+            if not self._live(model_type, job):
+                continue
+
+            jobs = [job]
+            rows = len(job.inputs)
+            wait_until = time.monotonic() + self.max_wait_ms / 1000.0
+            while rows < self.max_batch_size:
+                remaining = wait_until - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if self._live(model_type, job):
+                    jobs.append(job)
+                    rows += len(job.inputs)
+
+            ready = []
+            for job in jobs:
+                if not self._live(model_type, job):
+                    continue
+                if job.future.set_running_or_notify_cancel():
+                    ready.append(job)
+                else:
+                    self._release(model_type, 1)
+            if ready:
+                await self._serve(model_type, ready)
+
+    async def _serve(self, model_type, jobs):
+        started = time.monotonic()
+        try:
+            batch = np.concatenate([job.inputs for job in jobs], axis=0)
+            outputs = await self._loop.run_in_executor(self._executor, self.predict_fns[model_type], batch)
+        except Exception as e:
+            logger.error(f"Async inference failed for {model_type}: {e}")
+            self._release(model_type, len(jobs))
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+
+        inference_ms = (time.monotonic() - started) * 1000
+        self._release(model_type, len(jobs))
+
+        start = 0
+        for job in jobs:
+            end = start + len(job.inputs)
+            queue_wait_ms = (started - job.enqueued_at) * 1000
+            with self._lock:
+                counters = self._counters[model_type]
+                counters['served'] += 1
+                counters['queue_wait_ms'] += queue_wait_ms
+                counters['inference_ms'] += inference_ms
+            job.future.set_result((outputs[start:end], {
+                'queue_wait_ms': round(queue_wait_ms, 2),
+                'inference_ms': round(inference_ms, 2)
+            }))
+            start = end
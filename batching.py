@@ -0,0 +1,133 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Gather concurrent inference requests for one model into batched forward passes"""
+
+    def __init__(self, name, predict_fn, max_batch_size=16, max_wait_ms=5, concurrency=1):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.concurrency = concurrency
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches_run = 0
+        self._rows_run = 0
+        self._last_batch_size = 0
+        self._inference_ms_total = 0.0
+        self._running = True
+
+        # More than one runner keeps several batches in flight when inference runs out of process
+        self._threads = [
+            threading.Thread(target=self._run, name=f"batcher-{name}-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, inputs):
+        """Queue a batch of one or more preprocessed images, returns a Future of their output rows"""
+        future = Future()
+        self._queue.put((inputs, future))
+        return future
+
+    def stop(self):
+        self._running = False
+        for thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def stats(self):
+        with self._lock:
+            batches = self._batches_run
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'concurrency': self.concurrency,
+                'queue_depth': self._queue.qsize(),
+                'batches_run': batches,
+                'rows_run': self._rows_run,
+                'last_batch_size': self._last_batch_size,
+                'avg_batch_size': round(self._rows_run / batches, 2) if batches else 0,
+                'avg_inference_ms': round(self._inference_ms_total / batches, 2) if batches else 0
+            }
+
+    def _collect(self):
+        """Block for the first request, then keep gathering until the batch is full or the wait expires"""
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        pending = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            pending.append(item)
+            rows += len(item[0])
+
+        return pending
+
+    def _run(self):
+        while self._running:
+            pending = self._collect()
+            if not pending:
+                continue
+
+            pending = [(inputs, future) for inputs, future in pending if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+
+            try:
+                batch = np.concatenate([inputs for inputs, _ in pending], axis=0)
+                started = time.perf_counter()
+                outputs = self.predict_fn(batch)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            except Exception as e:
+                logger.error(f"Batched inference failed for {self.name}: {e}")
+                self._run_individually(pending, e)
+                continue
+
+            with self._lock:
+                self._batches_run += 1
+                self._rows_run += len(batch)
+                self._last_batch_size = len(batch)
+                self._inference_ms_total += elapsed_ms
+
+            start = 0
+            for inputs, future in pending:
+                end = start + len(inputs)
+                future.set_result(outputs[start:end])
+                start = end
+
+    def _run_individually(self, pending, error):
+        """Retry a failed batch one request at a time so one bad input cannot fail its neighbours"""
+        if len(pending) == 1:
+            pending[0][1].set_exception(error)
+            return
+        for inputs, future in pending:
+            try:
+                future.set_result(self.predict_fn(inputs))
+            except Exception as e:
+                future.set_exception(e)
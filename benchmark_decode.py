@@ -0,0 +1,91 @@
+"""Benchmark full-resolution vs. reduced-resolution (draft) JPEG decoding by megapixel count.
+
+Each case runs in a fresh subprocess so peak RSS is measured per decode mode. MPO is the
+multi-picture JPEG variant many phones write (gain maps, dual cameras).
+
+    python benchmark_decode.py
+    python benchmark_decode.py --megapixels 2 12 48 --repeat 5 --formats JPEG
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_decoding import decode_image
+
+ASPECT = (4, 3)
+
+
+def make_jpeg(megapixels, path, image_format='JPEG'):
+    """Write a noisy 4:3 JPEG or MPO with roughly the given pixel count (noise keeps the encoder honest)"""
+    unit = int((megapixels * 1e6 / (ASPECT[0] * ASPECT[1])) ** 0.5)
+    size = (unit * ASPECT[0], unit * ASPECT[1])
+    channels = [Image.effect_noise(size, 64) for _ in range(3)]
+    img = Image.merge('RGB', channels)
+    if image_format == 'MPO':
+        # A second, smaller picture stands in for the gain map / secondary camera frame
+        secondary = img.resize((size[0] // 4, size[1] // 4))
+        img.save(path, 'MPO', quality=90, save_all=True, append_images=[secondary])
+    else:
+        img.save(path, 'JPEG', quality=90)
+    return size
+
+
+def run_child(path, draft, repeat):
+    """Decode one file `repeat` times and report latency plus peak RSS growth over the raw bytes"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        img = decode_image(io.BytesIO(data), draft=draft)
+        np.asarray(img, dtype=np.float32) / 255.0
+        timings.append((time.perf_counter() - started) * 1000)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'median_ms': float(np.median(timings)),
+        'peak_rss_mb': (peak_kb - baseline_kb) / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[2, 8, 12, 24, 48])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--formats', nargs='+', choices=['JPEG', 'MPO'], default=['JPEG', 'MPO'])
+    parser.add_argument('--child', nargs=2, metavar=('PATH', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1] == 'draft', args.repeat)
+        return
+
+    print(f"{'MP':>5} {'format':>6} {'size':>11} {'mode':>6} {'median ms':>10} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in args.megapixels:
+            for image_format in args.formats:
+                path = os.path.join(tmp, f'{megapixels}mp.{image_format.lower()}')
+                width, height = make_jpeg(megapixels, path, image_format)
+                for mode in ('full', 'draft'):
+                    output = subprocess.run(
+                        [sys.executable, __file__, '--child', path, mode, '--repeat', str(args.repeat)],
+                        check=True, capture_output=True, text=True
+                    ).stdout
+                    result = json.loads(output)
+                    print(f"{megapixels:>5g} {image_format:>6} {f'{width}x{height}':>11} {mode:>6} "
+                          f"{result['median_ms']:>10.1f} {result['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
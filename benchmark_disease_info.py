@@ -0,0 +1,55 @@
+"""Microbenchmark: per-call disease_info construction + encoding vs. the precompiled knowledge base.
+
+The old path rebuilt both full dict literals on every /predict call and then JSON-encoded the chosen
+entry. It is reproduced here by compiling the same literals into a function body.
+
+    python benchmark_disease_info.py
+"""
+import argparse
+import json
+import timeit
+
+import disease_knowledge
+
+DATA_PATH = 'knowledge/diseases.json'
+
+
+def build_legacy_lookup(diseases):
+    """Recreate the old per-call behaviour: evaluate both literal dicts, then pick one entry"""
+    source = (
+        'def legacy(disease_class, model_type):\n'
+        f'    fruit_diseases = {diseases["fruit"]!r}\n'
+        f'    leaf_diseases = {diseases["leaf"]!r}\n'
+        '    return (fruit_diseases if model_type == "fruit" else leaf_diseases).get(disease_class)\n'
+    )
+    namespace = {}
+    exec(compile(source, '<legacy>', 'exec'), namespace)
+    return namespace['legacy']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    knowledge = disease_knowledge.load(DATA_PATH)
+    with open(DATA_PATH, 'r', encoding='utf-8') as f:
+        diseases = json.load(f)['diseases']
+    legacy = build_legacy_lookup(diseases)
+    classes = [(model_type, name) for model_type in ('fruit', 'leaf') for name in diseases[model_type]]
+
+    def old_path():
+        for model_type, disease_class in classes:
+            json.dumps(legacy(disease_class, model_type))
+
+    def new_path():
+        for model_type, disease_class in classes:
+            knowledge.get_disease_info_json(disease_class, model_type)
+
+    for name, fn in (('per-call dicts + json.dumps', old_path), ('precompiled index bytes', new_path)):
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=3))
+        print(f"{name:<28} {seconds * 1e6 / (args.number * len(classes)):8.2f} us/lookup")
+
+
+if __name__ == '__main__':
+    main()
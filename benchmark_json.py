@@ -0,0 +1,103 @@
+"""Benchmark JSON serialization and response compression on representative API payloads.
+
+Compares the stdlib encoder as Flask's default provider configures it (sorted keys, ASCII
+escapes) against fast_json.dumps, then gzip and brotli sizes and times for each payload.
+
+    python benchmark_json.py
+    python benchmark_json.py --repeat 5000
+"""
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import disease_knowledge
+import fast_json
+from compression import brotli
+
+DATA_PATH = 'knowledge/diseases.json'
+
+
+def prediction_payload(knowledge):
+    (model_type, disease_class), entry = next(iter(knowledge.index.items()))
+    return {
+        'prediction_id': 123,
+        'model_type': model_type,
+        'predicted_class': disease_class,
+        'confidence': np.float32(0.9877),
+        'class_index': np.int64(0),
+        'cached': False,
+        'knowledge_version': knowledge.version,
+        'timestamp': datetime.now().isoformat(),
+        'disease_info': json.loads(knowledge.encoded[(model_type, disease_class)])
+    }
+
+
+def history_payload(knowledge, rows=50):
+    classes = list(knowledge.index)
+    started = datetime.now()
+    return [
+        {
+            'id': 1000 - i,
+            'timestamp': (started - timedelta(minutes=i)).isoformat(),
+            'predicted_class': classes[i % len(classes)][1],
+            'confidence': np.float64(0.5 + (i % 50) / 100),
+            'model_type': classes[i % len(classes)][0],
+            'rating': 5 if i % 3 else None,
+            'is_correct': bool(i % 4),
+            'comment': 'Matched what the extension officer said' if i % 5 == 0 else None
+        }
+        for i in range(rows)
+    ]
+
+
+def stdlib_dumps(obj):
+    # Flask's DefaultJSONProvider settings; NumPy values need casting first
+    return json.dumps(obj, default=lambda o: o.item(), ensure_ascii=True, sort_keys=True).encode('utf-8')
+
+
+def time_it(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    knowledge = disease_knowledge.load(DATA_PATH)
+    payloads = {
+        'prediction': prediction_payload(knowledge),
+        'history (50 rows)': history_payload(knowledge)
+    }
+
+    print(f"Fast encoder backend: {fast_json.BACKEND}")
+    print(f"\n{'payload':<18} {'stdlib us':>10} {'fast us':>9} {'speedup':>8} {'bytes':>7}")
+    encoded = {}
+    for name, payload in payloads.items():
+        stdlib_us, _ = time_it(lambda: stdlib_dumps(payload), args.repeat)
+        fast_us, body = time_it(lambda: fast_json.dumps(payload), args.repeat)
+        encoded[name] = body
+        print(f"{name:<18} {stdlib_us:>10.1f} {fast_us:>9.1f} {stdlib_us / fast_us:>7.1f}x {len(body):>7}")
+
+    codecs = [(f'gzip-{level}', lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0)) for level in (1, 6, 9)]
+    if brotli is not None:
+        codecs += [(f'br-{quality}', lambda data, quality=quality: brotli.compress(data, quality=quality)) for quality in (1, 4, 11)]
+    else:
+        print("\nbrotli is not installed; skipping brotli")
+
+    print(f"\n{'payload':<18} {'codec':>7} {'bytes':>7} {'ratio':>6} {'us':>8}")
+    for name, body in encoded.items():
+        for codec, compress in codecs:
+            codec_us, compressed = time_it(lambda: compress(body), max(args.repeat // 10, 1))
+            print(f"{name:<18} {codec:>7} {len(compressed):>7} {len(compressed) / len(body):>6.2f} {codec_us:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
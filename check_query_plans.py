@@ -0,0 +1,102 @@
+"""Check that the /history and /analytics queries are served from indexes rather than full scans.
+
+Runs EXPLAIN QUERY PLAN against a migrated database and fails if an expected index is not used
+or a query needs a separate sort.
+Without --db, a temporary database is migrated and filled with synthetic rows.
+
+    python check_query_plans.py
+    python check_query_plans.py --db crop_disease_db.sqlite
+"""
+import argparse
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import migrations
+
+# The same page query runs against the main table and each monthly archive (partitions.py)
+HISTORY_SELECT = 'SELECT id, timestamp, predicted_class, confidence, model_type FROM predictions'
+
+# (name, sql, params, index names the plan must mention)
+HISTORY_ORDER = ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+KEYSET = '(timestamp, id) < (?, ?)'
+CURSOR = ('2025-01-03 00:00:00', 5000)
+
+QUERIES = [
+    ('history', HISTORY_SELECT + HISTORY_ORDER, (50,),
+     ['idx_predictions_timestamp']),
+    ('history by model', HISTORY_SELECT + ' WHERE model_type = ?' + HISTORY_ORDER, ('leaf', 50),
+     ['idx_predictions_model_timestamp']),
+    ('history cursor', HISTORY_SELECT + ' WHERE ' + KEYSET + HISTORY_ORDER, (*CURSOR, 50),
+     ['SEARCH predictions USING INDEX idx_predictions_timestamp']),
+    ('history cursor by model', HISTORY_SELECT + ' WHERE model_type = ? AND ' + KEYSET + HISTORY_ORDER, ('leaf', *CURSOR, 50),
+     ['SEARCH predictions USING INDEX idx_predictions_model_timestamp']),
+    ('history feedback', 'SELECT prediction_id, rating, is_correct, comment FROM feedback WHERE prediction_id IN (?, ?, ?)', (1, 2, 3),
+     ['idx_feedback_prediction_id']),
+    ('feedback lookup', 'SELECT id FROM feedback WHERE prediction_id = ?', (1,),
+     ['idx_feedback_prediction_id']),
+    ('analytics total', 'SELECT COUNT(*) FROM predictions', (),
+     ['COVERING INDEX']),
+    ('analytics by model', 'SELECT model_type, COUNT(*) FROM predictions GROUP BY model_type', (),
+     ['idx_predictions_model_timestamp'])
+]
+
+
+def populate(conn, rows):
+    started = datetime(2025, 1, 1)
+    predictions = [
+        (
+            (started + timedelta(seconds=i * 30)).strftime('%Y-%m-%d %H:%M:%S'),
+            random.choice(['fruit', 'leaf']),
+            f'Class_{random.randrange(16)}',
+            random.random(),
+            random.randrange(16),
+            f'{i}.jpg',
+            f'10.0.{random.randrange(256)}.{random.randrange(256)}'
+        )
+        for i in range(rows)
+    ]
+    conn.executemany('''
+        INSERT INTO predictions (timestamp, model_type, predicted_class, confidence, class_index, filename, user_ip)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', predictions)
+    conn.executemany(
+        'INSERT INTO feedback (prediction_id, rating, is_correct, comment) VALUES (?, ?, ?, ?)',
+        [(random.randrange(1, rows + 1), random.randint(1, 5), random.random() > 0.1, '') for _ in range(rows // 20)]
+    )
+    conn.commit()
+    conn.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='Existing database to check (it is migrated first)')
+    parser.add_argument('--rows', type=int, default=20000, help='Synthetic predictions for the temporary database')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db or ':memory:')
+    migrations.migrate(conn)
+    if not args.db:
+        populate(conn, args.rows)
+    print(f"Schema version {migrations.schema_version(conn)}\n")
+
+    failures = 0
+    for name, sql, params, expected in QUERIES:
+        plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+        missing = [index for index in expected if not any(index in step for step in plan)]
+        # A sort step means the index did not cover the ORDER BY
+        missing += [step for step in plan if 'TEMP B-TREE' in step]
+        failures += bool(missing)
+        print(f"{'FAIL' if missing else 'ok':<5} {name}")
+        for step in plan:
+            print(f"        {step}")
+        if missing:
+            print(f"        expected: {', '.join(missing)}")
+
+    conn.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
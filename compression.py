@@ -0,0 +1,124 @@
+import gzip
+import logging
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/css', 'text/plain', 'text/javascript'
+}
+
+
+def supported_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def etag_variants(etag):
+    """Every ETag a client may hold for one resource: compressed responses get a per-encoding suffix"""
+    return [etag] + [f"{etag}-{encoding}" for encoding in supported_encodings()]
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk so streamed lines reach the client promptly"""
+
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def wrap(self, chunks):
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = self._compress(chunk) + self._flush()
+            if data:
+                yield data
+        yield self._finish()
+
+
+class ResponseCompressor:
+    """after_request hook that gzip/brotli-compresses responses the client accepts, above a size threshold"""
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._lock = threading.Lock()
+        self._counters = {'compressed': 0, 'skipped_small': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def init_app(self, app):
+        app.after_request(self.process)
+
+    def negotiate(self, accept_encodings):
+        """Pick the best encoding the client accepts, preferring brotli on ties"""
+        best, best_quality = None, 0
+        for encoding in supported_encodings():
+            quality = accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def process(self, response):
+        from flask import request
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Length is unknown up front, so streams are always compressed
+            response.response = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality).wrap(response.response)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                with self._lock:
+                    self._counters['skipped_small'] += 1
+                return response
+            compressed = self.compress(data, encoding)
+            response.set_data(compressed)
+            with self._lock:
+                self._counters['compressed'] += 1
+                self._counters['bytes_in'] += len(data)
+                self._counters['bytes_out'] += len(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # Strong ETags must differ between encodings of the same resource
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['encodings'] = supported_encodings()
+        counters['min_size'] = self.min_size
+        counters['ratio'] = round(counters['bytes_out'] / counters['bytes_in'], 3) if counters['bytes_in'] else None
+        return counters
@@ -0,0 +1,128 @@
+"""Convert the Keras models to TFLite (float16/INT8) or ONNX and check parity against the original.
+
+Examples:
+    python convert_models.py leaf --format tflite-fp16
+    python convert_models.py fruit --format tflite-int8 --images data/fruit_diseases
+    python convert_models.py leaf --format onnx --check --images data/leaf_diseases
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.preprocessing import image
+
+from inference_backends import KerasBackend, load_backend
+
+MODEL_PATHS = {
+    'fruit': 'models/fruit_model.keras',
+    'leaf': 'models/leaf_disease_model.keras'
+}
+OUTPUT_SUFFIXES = {
+    'tflite-fp16': '_fp16.tflite',
+    'tflite-int8': '_int8.tflite',
+    'onnx': '.onnx'
+}
+IMG_SIZE = (224, 224)
+
+
+def find_images(image_dir, limit):
+    paths = []
+    for ext in ('jpg', 'jpeg', 'png'):
+        paths.extend(glob.glob(os.path.join(image_dir, '**', f'*.{ext}'), recursive=True))
+    paths = sorted(paths)[:limit]
+    if not paths:
+        raise SystemExit(f"No images found under {image_dir}")
+    return paths
+
+
+def load_images(image_dir, limit):
+    """Load up to `limit` images from a directory tree, preprocessed like app.preprocess_image"""
+    paths = find_images(image_dir, limit)
+    return np.stack([image.img_to_array(image.load_img(p, target_size=IMG_SIZE)) / 255.0 for p in paths]).astype(np.float32)
+
+
+def sample_inputs(args):
+    if args.images:
+        return load_images(args.images, args.samples)
+    print("No --images given, using random inputs (calibration and parity results will not be representative)")
+    return np.random.default_rng(0).random((args.samples, *IMG_SIZE, 3), dtype=np.float32)
+
+
+def convert_tflite(model, output_path, quantization, calibration):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'fp16':
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        converter.representative_dataset = lambda: ([calibration[i:i + 1]] for i in range(len(calibration)))
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def convert_onnx(model, output_path):
+    import tf2onnx
+    signature = [tf.TensorSpec((None, *IMG_SIZE, 3), tf.float32, name='input')]
+    tf2onnx.convert.from_keras(model, input_signature=signature, output_path=output_path)
+
+
+def time_per_image(backend, inputs):
+    backend.predict(inputs[:1])
+    started = time.perf_counter()
+    for i in range(len(inputs)):
+        backend.predict(inputs[i:i + 1])
+    return (time.perf_counter() - started) * 1000 / len(inputs)
+
+
+def check_parity(keras_backend, candidate, inputs):
+    """Report top-1 agreement and batch-1 latency of a converted model against the Keras original"""
+    reference = keras_backend.predict(inputs)
+    converted = candidate.predict(inputs)
+    agreement = float(np.mean(np.argmax(reference, axis=1) == np.argmax(converted, axis=1)))
+    max_abs_diff = float(np.max(np.abs(reference - converted)))
+
+    keras_ms = time_per_image(keras_backend, inputs)
+    candidate_ms = time_per_image(candidate, inputs)
+
+    print(f"Samples:           {len(inputs)}")
+    print(f"Top-1 agreement:   {agreement:.2%}")
+    print(f"Max prob diff:     {max_abs_diff:.4f}")
+    print(f"Keras latency:     {keras_ms:.2f} ms/image")
+    print(f"{candidate.name} latency: {candidate_ms:.2f} ms/image ({keras_ms / candidate_ms:.2f}x)")
+    return agreement
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model_type', choices=sorted(MODEL_PATHS))
+    parser.add_argument('--format', choices=sorted(OUTPUT_SUFFIXES), required=True)
+    parser.add_argument('--output', help='Output path (default: next to the Keras model)')
+    parser.add_argument('--images', help='Directory of sample images for INT8 calibration and the parity check')
+    parser.add_argument('--samples', type=int, default=100, help='Number of sample images to use')
+    parser.add_argument('--check', action='store_true', help='Run the parity check after converting')
+    parser.add_argument('--check-only', action='store_true', help='Skip conversion and only check an existing output')
+    args = parser.parse_args()
+
+    keras_path = MODEL_PATHS[args.model_type]
+    output_path = args.output or keras_path.rsplit('.', 1)[0] + OUTPUT_SUFFIXES[args.format]
+    inputs = sample_inputs(args)
+    keras_backend = KerasBackend(keras_path)
+
+    if not args.check_only:
+        if args.format == 'onnx':
+            convert_onnx(keras_backend.model, output_path)
+        else:
+            convert_tflite(keras_backend.model, output_path, args.format.split('-')[1], inputs)
+        print(f"{args.model_type} model converted to {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB)")
+
+    if args.check or args.check_only:
+        check_parity(keras_backend, load_backend(args.format.split('-')[0], output_path), inputs)
+
+
+if __name__ == '__main__':
+    main()
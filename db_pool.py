@@ -0,0 +1,154 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',        # Readers no longer block on writers
+    'synchronous': 'NORMAL',      # Safe with WAL: only a checkpoint fsyncs
+    'cache_size': -16384,         # Negative means KiB, so 16 MB of page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,         # Milliseconds to wait on a locked database instead of failing
+    'temp_store': 'MEMORY'
+}
+
+
+class PoolTimeoutError(Exception):
+    """No connection became free before the acquire timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of persistent SQLite connections; a thread that already holds one gets it again"""
+
+    def __init__(self, path, max_connections=8, pragmas=None, acquire_timeout=30):
+        self.path = path
+        self.max_connections = max_connections
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._counters = {'acquired': 0, 'waited': 0, 'wait_ms': 0.0, 'timeouts': 0, 'discarded': 0}
+        self._closed = False
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.pragmas.get('busy_timeout', 5000) / 1000, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            mode = conn.execute(f'PRAGMA {name} = {value}').fetchone()
+            if name == 'journal_mode' and mode and mode[0].upper() != str(value).upper():
+                logger.warning(f"SQLite journal_mode is {mode[0]}, requested {value}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_connections:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        started = time.monotonic()
+        try:
+            conn = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            with self._lock:
+                self._counters['timeouts'] += 1
+            raise PoolTimeoutError(f"No database connection free within {self.acquire_timeout}s")
+        with self._lock:
+            self._counters['waited'] += 1
+            self._counters['wait_ms'] += (time.monotonic() - started) * 1000
+        return conn
+
+    def _release(self, conn, broken):
+        if broken or self._closed:
+            with self._lock:
+                self._created -= 1
+                self._counters['discarded'] += broken
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the block; uncommitted work is rolled back when it is returned"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            # Nested use on the same thread shares the outer connection and transaction
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        with self._lock:
+            self._in_use += 1
+            self._counters['acquired'] += 1
+
+        broken = False
+        try:
+            yield conn
+        except sqlite3.Error as e:
+            broken = isinstance(e, (sqlite3.InterfaceError, sqlite3.ProgrammingError))
+            raise
+        finally:
+            self._local.conn = None
+            with self._lock:
+                self._in_use -= 1
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                broken = True
+            self._release(conn, broken)
+
+    def stats(self):
+        with self._lock:
+            acquired = self._counters['acquired']
+            return {
+                'path': self.path,
+                'max_connections': self.max_connections,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'acquired': acquired,
+                'waited': self._counters['waited'],
+                'avg_wait_ms': round(self._counters['wait_ms'] / self._counters['waited'], 2) if self._counters['waited'] else 0,
+                'timeouts': self._counters['timeouts'],
+                'discarded': self._counters['discarded'],
+                'journal_mode': self.pragmas.get('journal_mode')
+            }
+
+    def close(self):
+        """Close idle connections; connections still in use are closed when they are returned"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            conn.close()
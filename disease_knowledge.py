@@ -0,0 +1,171 @@
+"""Disease knowledge base, loaded from a versioned data file into a read-only index keyed by (model_type, class).
+
+Every entry is frozen (dicts become mappingproxy, lists become tuples) and also kept as pre-serialized
+JSON bytes, so responses can splice an entry in without re-encoding it. When the data file changes, a
+new snapshot is built off the request path and swapped in with a single reference assignment, so
+in-flight requests keep reading the snapshot they started with.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def encode_entry(entry):
+    return json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _build_index(sources):
+    entries = {}
+    encoded = {}
+    for model_type, diseases in sources.items():
+        for disease_class, entry in diseases.items():
+            entries[(model_type, disease_class)] = _freeze(entry)
+            encoded[(model_type, disease_class)] = encode_entry(entry)
+    return MappingProxyType(entries), MappingProxyType(encoded)
+
+
+class KnowledgeBase:
+    """Immutable snapshot of one version of the disease data file"""
+
+    def __init__(self, version, sources, path=None, mtime=None):
+        self.version = version
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self.index, self.encoded = _build_index(sources)
+        # Content hashes double as strong ETags for the /disease endpoint
+        self.etags = MappingProxyType({
+            key: hashlib.sha256(encoded).hexdigest()[:32] for key, encoded in self.encoded.items()
+        })
+
+    def get_disease_info(self, disease_class, model_type, confidence=1.0):
+        """Read-only entry for a class, or a freshly built fallback for unknown classes"""
+        entry = self.index.get((model_type, disease_class))
+        if entry is not None:
+            return entry
+        return unknown_disease_info(disease_class, model_type, confidence)
+
+    def get_disease_info_json(self, disease_class, model_type, confidence=1.0):
+        """Pre-serialized JSON bytes for a class; only unknown classes are encoded per call"""
+        encoded = self.encoded.get((model_type, disease_class))
+        if encoded is not None:
+            return encoded
+        return encode_entry(unknown_disease_info(disease_class, model_type, confidence))
+
+
+_current = KnowledgeBase('empty', {})
+
+
+def load(path):
+    """Parse and index a data file, then make it the active snapshot"""
+    global _current
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'version' not in data or not isinstance(data.get('diseases'), dict):
+        raise ValueError(f"{path} must contain 'version' and 'diseases'")
+
+    snapshot = KnowledgeBase(str(data['version']), data['diseases'], path, mtime)
+    _current = snapshot
+    logger.info(f"Disease knowledge base {snapshot.version} loaded from {path}: {len(snapshot.index)} entries")
+    return snapshot
+
+
+def current():
+    """The active snapshot; hold on to it for the duration of a request"""
+    return _current
+
+
+def reload_if_changed():
+    """Reload the active data file if it changed on disk; a broken file keeps the old snapshot serving"""
+    snapshot = _current
+    if snapshot.path is None:
+        return False
+    try:
+        if os.stat(snapshot.path).st_mtime_ns == snapshot.mtime:
+            return False
+        load(snapshot.path)
+        return True
+    except (OSError, ValueError) as e:
+        logger.error(f"Keeping disease knowledge base {snapshot.version}, reload failed: {e}")
+        return False
+
+
+def start_watcher(interval_seconds=2.0):
+    """Poll the data file in the background so reloads never run on the request path"""
+    def watch():
+        while True:
+            time.sleep(interval_seconds)
+            reload_if_changed()
+
+    thread = threading.Thread(target=watch, name='knowledge-watcher', daemon=True)
+    thread.start()
+    return thread
+
+
+def unknown_disease_info(disease_class, model_type, confidence=1.0):
+    """Fallback entry for classes missing from the knowledge base (built per call, it embeds the class)"""
+    if model_type == 'fruit':
+        return {
+            'type': 'Unknown Classification',
+            'severity': 'Requires Investigation',
+            'description': f'The classification "{disease_class}" is not recognized in the disease database.',
+            'symptoms': [
+                f'AI classified this as "{disease_class}" with {confidence:.1%} confidence',
+                'This classification is not in the trained apple disease categories',
+                'Expected: Apple Black Rot, Apple Cedar Rust, Apple Scab, Apple Healthy, or generic Apple/Mango detection'
+            ],
+            'remedies': [
+                'Verify the fruit_classes.json mapping file contains correct disease names',
+                'Check that the model was trained for disease classification, not general fruit classification',
+                'Upload a clearer image showing disease symptoms or healthy tissue',
+                'Consult agricultural experts for proper disease identification'
+            ],
+            'prevention': [
+                'Use proper disease classification models trained on apple diseases',
+                'Ensure mapping files match the model training classes',
+                'Upload high-quality images with clear disease symptoms'
+            ]
+        }
+
+    if model_type == 'leaf':
+        return {
+            'type': 'Unknown Disease',
+            'severity': 'Unknown',
+            'description': 'Disease information not available in the leaf disease database.',
+            'symptoms': ['Consult agricultural expert for proper identification'],
+            'remedies': ['Seek professional agricultural consultation'],
+            'prevention': ['Follow general crop protection practices']
+        }
+
+    # Default fallback
+    return {
+        'type': 'Unknown Disease',
+        'severity': 'Unknown',
+        'description': 'Disease information not available in database.',
+        'symptoms': ['Consult agricultural expert for proper identification'],
+        'remedies': ['Seek professional agricultural consultation'],
+        'prevention': ['Follow general crop protection practices']
+    }
+
+
+def get_disease_info(disease_class, model_type, confidence=1.0):
+    return _current.get_disease_info(disease_class, model_type, confidence)
+
+
+def get_disease_info_json(disease_class, model_type, confidence=1.0):
+    return _current.get_disease_info_json(disease_class, model_type, confidence)
@@ -0,0 +1,92 @@
+"""Export a Keras model as a SavedModel whose serving signature takes encoded JPEG/PNG bytes.
+
+Decode, resize and /255 normalization run inside the graph, so /predict can feed upload bytes
+straight to the model. Select it in app.py with MODEL_BACKENDS[...] = ('savedmodel', <output dir>).
+
+Examples:
+    python export_serving_model.py leaf
+    python export_serving_model.py fruit --check --images data/fruit_diseases
+"""
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from convert_models import MODEL_PATHS, IMG_SIZE, find_images, load_images
+from inference_backends import SavedModelBackend
+
+OUTPUT_DIRS = {
+    'fruit': 'models/fruit_serving',
+    'leaf': 'models/leaf_disease_serving'
+}
+
+
+def decode_and_resize(encoded):
+    # Nearest-neighbour resize matches keras.preprocessing.image.load_img used by the Python path
+    img = tf.io.decode_image(encoded, channels=3, expand_animations=False)
+    img = tf.image.resize(img, IMG_SIZE, method='nearest')
+    return tf.cast(img, tf.float32) / 255.0
+
+
+class ServingModule(tf.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    @tf.function(input_signature=[tf.TensorSpec([None], tf.string, name='images')])
+    def serve_bytes(self, images):
+        batch = tf.map_fn(decode_and_resize, images, fn_output_signature=tf.TensorSpec((*IMG_SIZE, 3), tf.float32))
+        return {'probabilities': self.model(batch, training=False)}
+
+    @tf.function(input_signature=[tf.TensorSpec([None, *IMG_SIZE, 3], tf.uint8, name='images')])
+    def serve_uint8(self, images):
+        return {'probabilities': self.model(tf.cast(images, tf.float32) / 255.0, training=False)}
+
+    @tf.function(input_signature=[tf.TensorSpec([None, *IMG_SIZE, 3], tf.float32, name='images')])
+    def serve_float(self, images):
+        return {'probabilities': self.model(images, training=False)}
+
+
+def export(model_path, output_dir):
+    module = ServingModule(tf.keras.models.load_model(model_path))
+    tf.saved_model.save(module, output_dir, signatures={
+        'serving_default': module.serve_bytes,
+        'serve_uint8': module.serve_uint8,
+        'serve_float': module.serve_float
+    })
+
+
+def check_parity(model_path, output_dir, image_dir, limit):
+    """Compare the in-graph decode path against the Python preprocessing path on real images"""
+    paths = find_images(image_dir, limit)
+    reference = tf.keras.models.load_model(model_path).predict(load_images(image_dir, limit), verbose=0)
+    encoded = np.array([open(p, 'rb').read() for p in paths], dtype=object)
+    served = SavedModelBackend(output_dir).predict(encoded)
+
+    agreement = float(np.mean(np.argmax(reference, axis=1) == np.argmax(served, axis=1)))
+    print(f"Samples:         {len(paths)}")
+    print(f"Top-1 agreement: {agreement:.2%}")
+    print(f"Max prob diff:   {float(np.max(np.abs(reference - served))):.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model_type', choices=sorted(MODEL_PATHS))
+    parser.add_argument('--output', help='SavedModel directory (default: models/<model>_serving)')
+    parser.add_argument('--images', help='Directory of sample images for the parity check')
+    parser.add_argument('--samples', type=int, default=100)
+    parser.add_argument('--check', action='store_true', help='Compare against the Keras model after exporting')
+    args = parser.parse_args()
+
+    output_dir = args.output or OUTPUT_DIRS[args.model_type]
+    export(MODEL_PATHS[args.model_type], output_dir)
+    print(f"{args.model_type} serving model exported to {output_dir}")
+
+    if args.check:
+        if not args.images:
+            raise SystemExit("--check needs --images")
+        check_parity(MODEL_PATHS[args.model_type], output_dir, args.images, args.samples)
+
+
+if __name__ == '__main__':
+    main()
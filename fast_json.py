@@ -0,0 +1,64 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _default(obj):
+    """Types neither encoder handles natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        """Serialize to compact UTF-8 JSON bytes; NumPy scalars and arrays are encoded natively"""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps(obj):
+        """Serialize to compact UTF-8 JSON bytes; NumPy scalars and arrays are encoded natively"""
+        return _encoder.encode(obj).encode('utf-8')
+
+    loads = json.loads
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that routes jsonify() through dumps() and skips the str round trip"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,167 @@
+"""User-reported accuracy per model and class, maintained as feedback arrives.
+
+/feedback updates these tables in the same transaction as the feedback row, so /analytics reads
+accuracy, mean rating and the confusion breakdown without joining feedback to predictions.
+"""
+from datetime import datetime, timezone
+
+TABLES = [
+    '''CREATE TABLE IF NOT EXISTS feedback_accuracy (
+        model_type TEXT NOT NULL,
+        predicted_class TEXT NOT NULL,
+        feedback_count INTEGER NOT NULL DEFAULT 0,
+        correct_count INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT,
+        PRIMARY KEY (model_type, predicted_class)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS feedback_confusion (
+        model_type TEXT NOT NULL,
+        predicted_class TEXT NOT NULL,
+        actual_class TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (model_type, predicted_class, actual_class)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS feedback_stats_meta (
+        name TEXT PRIMARY KEY,
+        value TEXT
+    )'''
+]
+UNKNOWN_CLASS = 'unknown'  # Incorrect predictions whose true class was not reported
+
+
+def create_tables(cursor):
+    for statement in TABLES:
+        cursor.execute(statement)
+
+
+def _now():
+    # Same UTC format as the CURRENT_TIMESTAMP defaults on the raw tables
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _accumulate(cursor, model_type, predicted_class, is_correct, rating, actual_class, at):
+    model_type = model_type or 'leaf'
+    predicted_class = predicted_class or ''
+    cursor.execute('''
+        INSERT INTO feedback_accuracy (model_type, predicted_class, feedback_count, correct_count, rating_sum, updated_at)
+        VALUES (?, ?, 1, ?, ?, ?)
+        ON CONFLICT (model_type, predicted_class) DO UPDATE SET
+            feedback_count = feedback_count + 1,
+            correct_count = correct_count + excluded.correct_count,
+            rating_sum = rating_sum + excluded.rating_sum,
+            updated_at = MAX(COALESCE(updated_at, ''), excluded.updated_at)
+    ''', (model_type, predicted_class, 1 if is_correct else 0, rating or 0, at))
+    actual = predicted_class if is_correct else (actual_class or UNKNOWN_CLASS)
+    cursor.execute('''
+        INSERT INTO feedback_confusion (model_type, predicted_class, actual_class, count) VALUES (?, ?, ?, 1)
+        ON CONFLICT (model_type, predicted_class, actual_class) DO UPDATE SET count = count + 1
+    ''', (model_type, predicted_class, actual))
+
+
+def record_feedback(cursor, model_type, predicted_class, is_correct, rating, actual_class=None):
+    """Fold one feedback row into the aggregates"""
+    now = _now()
+    _accumulate(cursor, model_type, predicted_class, is_correct, rating, actual_class, now)
+    cursor.execute("INSERT OR REPLACE INTO feedback_stats_meta (name, value) VALUES ('last_feedback_at', ?)", (now,))
+
+
+def _percent(correct, total):
+    return round(100.0 * correct / total, 2) if total else None
+
+
+def read(cursor):
+    """Accuracy, mean rating and confusion counts, plus when they last changed"""
+    rows = cursor.execute('''
+        SELECT model_type, predicted_class, feedback_count, correct_count, rating_sum, updated_at
+        FROM feedback_accuracy ORDER BY model_type, feedback_count DESC
+    ''').fetchall()
+
+    models = {}
+    classes = []
+    for model_type, predicted_class, feedback_count, correct_count, rating_sum, updated_at in rows:
+        totals = models.setdefault(model_type, [0, 0, 0])
+        totals[0] += feedback_count
+        totals[1] += correct_count
+        totals[2] += rating_sum
+        classes.append({
+            'model': model_type,
+            'predicted_class': predicted_class,
+            'feedback_count': feedback_count,
+            'accuracy': _percent(correct_count, feedback_count),
+            'mean_rating': round(rating_sum / feedback_count, 2) if feedback_count else None,
+            'updated_at': updated_at
+        })
+
+    feedback_total = sum(totals[0] for totals in models.values())
+    correct_total = sum(totals[1] for totals in models.values())
+    rating_total = sum(totals[2] for totals in models.values())
+    meta = dict(cursor.execute('SELECT name, value FROM feedback_stats_meta').fetchall())
+    return {
+        'feedback_count': feedback_total,
+        'accuracy': _percent(correct_total, feedback_total),
+        'mean_rating': round(rating_total / feedback_total, 2) if feedback_total else None,
+        'models': [
+            {
+                'model': model_type,
+                'feedback_count': feedback_count,
+                'accuracy': _percent(correct_count, feedback_count),
+                'mean_rating': round(rating_sum / feedback_count, 2) if feedback_count else None
+            }
+            for model_type, (feedback_count, correct_count, rating_sum) in models.items()
+        ],
+        'classes': classes,
+        'confusion': [
+            {'model': model_type, 'predicted_class': predicted_class, 'actual_class': actual_class, 'count': count}
+            for model_type, predicted_class, actual_class, count in cursor.execute('''
+                SELECT model_type, predicted_class, actual_class, count FROM feedback_confusion
+                ORDER BY model_type, predicted_class, count DESC
+            ''')
+        ],
+        'freshness': {
+            'last_feedback_at': meta.get('last_feedback_at'),
+            'rebuilt_at': meta.get('rebuilt_at'),
+            'read_at': _now()
+        }
+    }
+
+
+def rebuild(cursor, lookup=None):
+    """Recompute the feedback aggregates from feedback joined to predictions; run inside a write transaction.
+
+    lookup maps prediction ids missing from the predictions table to (model_type, predicted_class),
+    e.g. from archived months; without it feedback on those predictions is skipped.
+    """
+    create_tables(cursor)
+    for table in ('feedback_accuracy', 'feedback_confusion', 'feedback_stats_meta'):
+        cursor.execute(f'DELETE FROM {table}')
+    cursor.execute('''
+        INSERT INTO feedback_accuracy (model_type, predicted_class, feedback_count, correct_count, rating_sum, updated_at)
+        SELECT COALESCE(p.model_type, 'leaf'), COALESCE(p.predicted_class, ''), COUNT(*),
+               SUM(CASE WHEN f.is_correct THEN 1 ELSE 0 END), COALESCE(SUM(f.rating), 0), MAX(f.timestamp)
+        FROM feedback f JOIN predictions p ON p.id = f.prediction_id
+        GROUP BY 1, 2
+    ''')
+    cursor.execute(f'''
+        INSERT INTO feedback_confusion (model_type, predicted_class, actual_class, count)
+        SELECT COALESCE(p.model_type, 'leaf'), COALESCE(p.predicted_class, ''),
+               CASE WHEN f.is_correct THEN COALESCE(p.predicted_class, '') ELSE COALESCE(f.actual_class, '{UNKNOWN_CLASS}') END,
+               COUNT(*)
+        FROM feedback f JOIN predictions p ON p.id = f.prediction_id
+        GROUP BY 1, 2, 3
+    ''')
+    if lookup is not None:
+        orphans = cursor.execute('''
+            SELECT f.prediction_id, f.is_correct, f.rating, f.actual_class, f.timestamp
+            FROM feedback f LEFT JOIN predictions p ON p.id = f.prediction_id
+            WHERE p.id IS NULL
+        ''').fetchall()
+        found = lookup({row[0] for row in orphans}) if orphans else {}
+        for prediction_id, is_correct, rating, actual_class, timestamp in orphans:
+            if prediction_id in found:
+                model_type, predicted_class = found[prediction_id]
+                _accumulate(cursor, model_type, predicted_class, is_correct, rating, actual_class, timestamp)
+    last = cursor.execute('SELECT MAX(timestamp) FROM feedback').fetchone()[0]
+    if last is not None:
+        cursor.execute("INSERT INTO feedback_stats_meta (name, value) VALUES ('last_feedback_at', ?)", (last,))
+    cursor.execute("INSERT INTO feedback_stats_meta (name, value) VALUES ('rebuilt_at', ?)", (_now(),))
@@ -8,6 +8,7 @@ let predictionHistory = [];
 let currentHistoryPage = 1;
 let historyLimit = 15;
 let totalHistoryPages = 1;
+let historyCursors = [null];  // historyCursors[page - 1] fetches that page; filled from X-Next-Cursor
 let systemStats = {};
 
 // DOM elements
@@ -641,6 +642,7 @@ function setupHistoryControls() {
     if (refreshBtn) {
         refreshBtn.addEventListener('click', () => {
             currentHistoryPage = 1;
+            historyCursors = [null];
             loadAndDisplayHistory();
         });
     }
@@ -663,10 +665,16 @@ async function loadAndDisplayHistory() {
     try {
         showHistoryLoading(true);
         
-        const offset = (currentHistoryPage - 1) * historyLimit;
         const modelFilter = document.getElementById('modelFilter')?.value || '';
+        const cursor = historyCursors[currentHistoryPage - 1];
         
-        let url = `${API_BASE_URL}/history?limit=${historyLimit}&offset=${offset}`;
+        // Pages reached by "next" seek from a cursor; anything else falls back to offset paging
+        let url = `${API_BASE_URL}/history?limit=${historyLimit}`;
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        } else {
+            url += `&offset=${(currentHistoryPage - 1) * historyLimit}`;
+        }
         if (modelFilter) {
             url += `&model_type=${modelFilter}`;
         }
@@ -676,6 +684,7 @@ async function loadAndDisplayHistory() {
         
         if (response.ok) {
             predictionHistory = data;
+            historyCursors[currentHistoryPage] = response.headers.get('X-Next-Cursor');
             displayHistory();
             updateHistoryStats();
         } else {
@@ -799,7 +808,7 @@ function handlePagination(action) {
             if (currentHistoryPage > 1) currentHistoryPage--;
             break;
         case 'nextPage':
-            if (currentHistoryPage < totalPages) currentHistoryPage++;
+            if (historyCursors[currentHistoryPage]) currentHistoryPage++;
             break;
         case 'lastPage':
             currentHistoryPage = totalPages;
@@ -821,7 +830,7 @@ function updatePaginationInfo() {
     
     if (firstBtn) firstBtn.disabled = currentHistoryPage === 1;
     if (prevBtn) prevBtn.disabled = currentHistoryPage === 1;
-    if (nextBtn) nextBtn.disabled = currentHistoryPage === totalPages;
+    if (nextBtn) nextBtn.disabled = !historyCursors[currentHistoryPage];
     if (lastBtn) lastBtn.disabled = currentHistoryPage === totalPages;
 }
 
@@ -0,0 +1,31 @@
+import io
+
+from PIL import Image, JpegImagePlugin
+
+TARGET_SIZE = (224, 224)
+
+
+def open_image(source):
+    """Open a path, file object or raw encoded bytes without decoding pixel data yet"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def decode_image(source, target_size=TARGET_SIZE, draft=True):
+    """Decode an image at the model input size.
+
+    With draft set, JPEGs are decoded straight at the smallest DCT scale (1/2, 1/4 or 1/8) that still
+    covers target_size, so a 48 MP photo never materializes at full resolution. That includes MPO files
+    (JPEGs with a multi-picture header, as written by phones for gain maps and dual cameras), which
+    Pillow opens as a JpegImageFile subclass. The final resize is
+    nearest-neighbour, matching keras.preprocessing.image.load_img.
+    """
+    img = open_image(source)
+    if draft and isinstance(img, JpegImagePlugin.JpegImageFile):
+        img.draft('RGB', target_size)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size != target_size:
+        img = img.resize(target_size, Image.NEAREST)
+    return img
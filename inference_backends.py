@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class KerasBackend:
+    """Serve a model straight from its .keras file"""
+
+    name = 'keras'
+
+    def __init__(self, model_path, num_threads=None):
+        import tensorflow as tf
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch, verbose=0):
+        return self.model.predict(batch, verbose=verbose)
+
+
+class TFLiteBackend:
+    """Serve a float16 or INT8 quantized TFLite flatbuffer"""
+
+    name = 'tflite'
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads or os.cpu_count())
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self.input_detail['shape'][0])
+        # The interpreter holds mutable tensor state, so calls must not interleave
+        self._lock = threading.Lock()
+
+    def predict(self, batch, verbose=0):
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_detail['index'], [len(batch), *batch.shape[1:]])
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+
+            self.interpreter.set_tensor(self.input_detail['index'], self._quantize(batch))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self.output_detail['index']))
+
+    def _quantize(self, batch):
+        dtype = self.input_detail['dtype']
+        if dtype in (np.int8, np.uint8):
+            scale, zero_point = self.input_detail['quantization']
+            info = np.iinfo(dtype)
+            return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+        return batch.astype(dtype, copy=False)
+
+    def _dequantize(self, output):
+        if output.dtype in (np.int8, np.uint8):
+            scale, zero_point = self.output_detail['quantization']
+            return (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class OnnxBackend:
+    """Serve an ONNX export through ONNX Runtime"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, verbose=0):
+        return self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+class SavedModelBackend:
+    """Serve a SavedModel exported by export_serving_model.py, with decode/resize/normalize inside the graph.
+
+    Batches of encoded image bytes (object arrays) go through the graph's decode path, uint8 batches
+    are only normalized, and float batches are fed to the classifier directly.
+    """
+
+    name = 'savedmodel'
+    accepts_bytes = True
+
+    def __init__(self, model_path, num_threads=None):
+        import tensorflow as tf
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        self._tf = tf
+        self._module = tf.saved_model.load(model_path)
+        self._signatures = {
+            'bytes': self._module.signatures['serving_default'],
+            'uint8': self._module.signatures['serve_uint8'],
+            'float': self._module.signatures['serve_float']
+        }
+
+    def predict(self, batch, verbose=0):
+        if batch.dtype == object:
+            signature = self._signatures['bytes']
+            images = self._tf.constant(batch, dtype=self._tf.string)
+        elif batch.dtype == np.uint8:
+            signature = self._signatures['uint8']
+            images = self._tf.constant(batch)
+        else:
+            signature = self._signatures['float']
+            images = self._tf.constant(batch, dtype=self._tf.float32)
+        return signature(images=images)['probabilities'].numpy()
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'tflite': TFLiteBackend,
+    'onnx': OnnxBackend,
+    'savedmodel': SavedModelBackend
+}
+
+
+def load_backend(kind, model_path, num_threads=None):
+    """Instantiate the configured backend; every backend exposes a Keras-style predict(batch, verbose=0)"""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{kind}', expected one of {sorted(BACKENDS)}")
+    backend = BACKENDS[kind](model_path, num_threads=num_threads)
+    logger.info(f"Loaded {model_path} with {kind} backend")
+    return backend
@@ -0,0 +1,117 @@
+import logging
+import sqlite3
+
+import feedback_stats
+import partitions
+import prediction_stats
+import rollups
+
+logger = logging.getLogger(__name__)
+
+
+def _baseline(cursor):
+    """Tables as init_database created them, including databases from before model_type existed"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='predictions';")
+    if cursor.fetchone():
+        cursor.execute("PRAGMA table_info(predictions);")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'model_type' not in columns:
+            cursor.execute('ALTER TABLE predictions ADD COLUMN model_type TEXT DEFAULT "leaf";')
+            logger.info("Added model_type column to existing predictions table")
+    else:
+        cursor.execute('''
+            CREATE TABLE predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                model_type TEXT DEFAULT "leaf",
+                predicted_class TEXT,
+                confidence REAL,
+                class_index INTEGER,
+                filename TEXT,
+                user_ip TEXT
+            )
+        ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id INTEGER,
+            rating INTEGER CHECK(rating >= 1 AND rating <= 5),
+            is_correct BOOLEAN,
+            comment TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (prediction_id) REFERENCES predictions (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            subject TEXT,
+            message TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _running_aggregates(cursor):
+    prediction_stats.rebuild(cursor)
+
+
+def _trend_rollups(cursor):
+    rollups.rebuild(cursor)
+
+
+def _feedback_accuracy(cursor):
+    cursor.execute('ALTER TABLE feedback ADD COLUMN actual_class TEXT')
+    feedback_stats.rebuild(cursor)
+
+
+# (version, description, step): a step is a list of SQL statements or a callable taking a cursor.
+# Append new migrations with the next version number; never edit one that has shipped.
+MIGRATIONS = [
+    (1, 'baseline schema', _baseline),
+    (2, 'indexes for history paging and feedback joins', [
+        'CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_predictions_model_timestamp ON predictions (model_type, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_feedback_prediction_id ON feedback (prediction_id)'
+    ]),
+    (3, 'running aggregates for /stats and /analytics', _running_aggregates),
+    (4, 'hourly and daily rollups for /analytics/trends', _trend_rollups),
+    (5, 'feedback actual_class and live accuracy aggregates', _feedback_accuracy),
+    (6, 'catalog of monthly prediction archives', [partitions.CATALOG_TABLE])
+]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Apply pending migrations in order, each in its own transaction; returns the versions applied"""
+    applied = []
+    current = schema_version(conn)
+    for version, description, step in migrations:
+        if version <= current:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            if callable(step):
+                step(cursor)
+            else:
+                for statement in step:
+                    cursor.execute(statement)
+            # user_version is transactional, so a failed step leaves the old version in place
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.error(f"Schema migration {version} ({description}) failed")
+            raise
+        logger.info(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+        current = version
+    return applied
@@ -0,0 +1,324 @@
+"""Month-partitioned prediction storage.
+
+The main database keeps the hot months of predictions. Older months are moved into one archive
+file per month (<archive_dir>/predictions_YYYY_MM.sqlite), a chunk per short transaction, and
+registered in prediction_partitions. Reads merge the main table with the archives newest first,
+opening each archive read-only only when the page still needs older rows.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLE = '''CREATE TABLE IF NOT EXISTS prediction_partitions (
+    month TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    archived_at TEXT
+)'''
+ARCHIVE_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS predictions (
+        id INTEGER PRIMARY KEY,
+        timestamp DATETIME,
+        model_type TEXT DEFAULT "leaf",
+        predicted_class TEXT,
+        confidence REAL,
+        class_index INTEGER,
+        filename TEXT,
+        user_ip TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_predictions_model_timestamp ON predictions (model_type, timestamp)'
+]
+COLUMNS = 'id, timestamp, model_type, predicted_class, confidence, class_index, filename, user_ip'
+LOOKUP_CHUNK = 500
+
+
+def month_bounds(month):
+    """'YYYY-MM' -> ('YYYY-MM-01 00:00:00', first instant of the next month)"""
+    year, number = int(month[:4]), int(month[5:7])
+    following = f"{year + 1:04d}-01" if number == 12 else f"{year:04d}-{number + 1:02d}"
+    return f"{month}-01 00:00:00", f"{following}-01 00:00:00"
+
+
+def shift_month(month, delta):
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def current_month():
+    return datetime.now(timezone.utc).strftime('%Y-%m')
+
+
+class PartitionStore:
+    """Moves cold months out of the main predictions table and reads across all partitions"""
+
+    def __init__(self, pool, archive_dir, hot_months=1, retention_months=None, chunk_size=500, chunk_pause_ms=20):
+        if retention_months is not None and retention_months < hot_months:
+            raise ValueError('retention_months must be at least hot_months')
+        self.pool = pool
+        self.archive_dir = archive_dir
+        self.hot_months = hot_months
+        self.retention_months = retention_months
+        self.chunk_size = chunk_size
+        self.chunk_pause_ms = chunk_pause_ms
+
+    def partitions(self, conn):
+        """Archived months as (month, path, row_count, state), newest first"""
+        return conn.execute('SELECT month, path, row_count, state FROM prediction_partitions ORDER BY month DESC').fetchall()
+
+    def _open_archive(self, path):
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def history_page(self, conn, limit, offset=0, model_type=None, before=None):
+        """Newest-first (id, timestamp, predicted_class, confidence, model_type) rows across every partition.
+
+        before is a (timestamp, id) keyset cursor; offset paging has to read offset + limit rows.
+        """
+        conditions = []
+        params = []
+        if model_type:
+            conditions.append('model_type = ?')
+            params.append(model_type)
+        if before:
+            conditions.append('(timestamp, id) < (?, ?)')
+            params.extend(before)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        wanted = offset + limit
+        if limit < 1:
+            return []
+        sql = f'''
+            SELECT id, timestamp, predicted_class, confidence, model_type FROM predictions{where}
+            ORDER BY timestamp DESC, id DESC LIMIT ?
+        '''
+
+        rows = {row[0]: row for row in conn.execute(sql, [*params, wanted])}
+        page = sorted(rows.values(), key=lambda row: (row[1] or '', row[0]), reverse=True)
+        for month, path, _, _ in self.partitions(conn):
+            start, end = month_bounds(month)
+            if before and before[0] < start:
+                continue  # Everything in this month is newer than the cursor
+            if len(page) >= wanted and (page[wanted - 1][1] or '') >= end:
+                break  # The page is full of rows newer than this and every older month
+            try:
+                with closing(self._open_archive(path)) as archive:
+                    for row in archive.execute(sql, [*params, wanted]):
+                        # A row is in both places between an archive chunk's copy and its delete
+                        rows.setdefault(row[0], row)
+            except sqlite3.Error as e:
+                logger.error(f"Skipping unreadable archive {path}: {e}")
+                continue
+            page = sorted(rows.values(), key=lambda row: (row[1] or '', row[0]), reverse=True)[:wanted]
+            rows = {row[0]: row for row in page}
+        return page[offset:wanted]
+
+    def lookup(self, conn, prediction_ids, columns='model_type, predicted_class'):
+        """{id: row} for predictions found in the main table or any archive"""
+        remaining = set(prediction_ids)
+        found = {}
+
+        def search(connection):
+            ids = sorted(remaining)
+            for start in range(0, len(ids), LOOKUP_CHUNK):
+                chunk = ids[start:start + LOOKUP_CHUNK]
+                marks = ','.join('?' * len(chunk))
+                for row in connection.execute(f'SELECT id, {columns} FROM predictions WHERE id IN ({marks})', chunk):
+                    found[row[0]] = row[1:]
+            remaining.difference_update(found)
+
+        search(conn)
+        for _, path, _, _ in self.partitions(conn):
+            if not remaining:
+                break
+            try:
+                with closing(self._open_archive(path)) as archive:
+                    search(archive)
+            except sqlite3.Error as e:
+                logger.error(f"Skipping unreadable archive {path}: {e}")
+        return found
+
+    def find(self, conn, prediction_id, columns='model_type, predicted_class'):
+        """One prediction's columns from the main table or the newest archive holding it, else None"""
+        sql = f'SELECT {columns} FROM predictions WHERE id = ?'
+        row = conn.execute(sql, (prediction_id,)).fetchone()
+        for _, path, _, _ in self.partitions(conn):
+            if row is not None:
+                break
+            try:
+                with closing(self._open_archive(path)) as archive:
+                    row = archive.execute(sql, (prediction_id,)).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Skipping unreadable archive {path}: {e}")
+        return row
+
+    def iter_predictions(self, conn, columns):
+        """Every prediction row in the main table, then in each archive, each id once"""
+        yield from conn.execute(f'SELECT {columns} FROM predictions')
+        for _, path, _, _ in self.partitions(conn):
+            with closing(self._open_archive(path)) as archive:
+                rows = archive.execute(f'SELECT id, {columns} FROM predictions')
+                while True:
+                    batch = rows.fetchmany(LOOKUP_CHUNK)
+                    if not batch:
+                        break
+                    # Rows copied but not yet deleted from main were already yielded from there
+                    marks = ','.join('?' * len(batch))
+                    in_main = {row[0] for row in conn.execute(
+                        f'SELECT id FROM predictions WHERE id IN ({marks})', [row[0] for row in batch]
+                    )}
+                    yield from (row[1:] for row in batch if row[0] not in in_main)
+
+    def archive_path(self, month):
+        return os.path.join(self.archive_dir, f"predictions_{month.replace('-', '_')}.sqlite")
+
+    def archive_month(self, month):
+        """Move one month out of the main table; returns the number of rows moved"""
+        path = self.archive_path(month)
+        start, end = month_bounds(month)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with closing(sqlite3.connect(path)) as archive:
+            for statement in ARCHIVE_SCHEMA:
+                archive.execute(statement)
+            archive.commit()
+
+        moved = 0
+        with self.pool.connection() as conn:
+            # Registered before any rows move, so reads look in the archive from the first chunk on
+            conn.execute('''
+                INSERT INTO prediction_partitions (month, path, state) VALUES (?, ?, 'archiving')
+                ON CONFLICT (month) DO UPDATE SET state = 'archiving'
+            ''', (month, path))
+            conn.commit()
+            conn.execute('ATTACH DATABASE ? AS archive', (path,))
+            try:
+                while True:
+                    ids = [row[0] for row in conn.execute(
+                        'SELECT id FROM main.predictions WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp LIMIT ?',
+                        (start, end, self.chunk_size)
+                    )]
+                    if not ids:
+                        break
+                    marks = ','.join('?' * len(ids))
+                    # Commits spanning a WAL database and an attached one are not atomic, so the copy
+                    # commits on its own before the delete; a crash in between leaves duplicates that
+                    # readers drop by id and the next run skips, never lost rows
+                    conn.execute('BEGIN')
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.predictions ({COLUMNS})
+                        SELECT {COLUMNS} FROM main.predictions WHERE id IN ({marks})
+                    ''', ids)
+                    conn.commit()
+                    conn.execute('BEGIN IMMEDIATE')
+                    conn.execute(f'DELETE FROM main.predictions WHERE id IN ({marks})', ids)
+                    conn.commit()
+                    moved += len(ids)
+                    # Short transactions with a pause between them keep /predict inserts flowing
+                    time.sleep(self.chunk_pause_ms / 1000.0)
+
+                row_count = conn.execute('SELECT COUNT(*) FROM archive.predictions').fetchone()[0]
+                conn.execute('''
+                    UPDATE prediction_partitions SET row_count = ?, state = 'archived', archived_at = ?
+                    WHERE month = ?
+                ''', (row_count, datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), month))
+                conn.commit()
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.execute('DETACH DATABASE archive')
+        logger.info(f"Archived {moved} predictions from {month} to {path}")
+        return moved
+
+    def months_due(self, conn):
+        """Months in the main table older than the hot window, oldest first"""
+        cutoff = month_bounds(shift_month(current_month(), -(self.hot_months - 1)))[0]
+        months = []
+        boundary = ''
+        while True:
+            oldest = conn.execute(
+                'SELECT MIN(timestamp) FROM predictions WHERE timestamp >= ? AND timestamp < ?', (boundary, cutoff)
+            ).fetchone()[0]
+            if oldest is None:
+                return months
+            months.append(oldest[:7])
+            boundary = month_bounds(oldest[:7])[1]
+
+    def apply_retention(self):
+        """Drop archive partitions older than the retention window; returns the months removed"""
+        if self.retention_months is None:
+            return []
+        oldest_kept = shift_month(current_month(), -(self.retention_months - 1))
+        with self.pool.connection() as conn:
+            expired = conn.execute(
+                'SELECT month, path FROM prediction_partitions WHERE month < ? ORDER BY month', (oldest_kept,)
+            ).fetchall()
+            for month, path in expired:
+                # Unregister first so no reader opens the file while it is being removed
+                conn.execute('DELETE FROM prediction_partitions WHERE month = ?', (month,))
+                conn.commit()
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                logger.info(f"Retention removed archived predictions for {month}")
+        return [month for month, _ in expired]
+
+    def run_once(self):
+        with self.pool.connection() as conn:
+            due = self.months_due(conn)
+        moved = sum(self.archive_month(month) for month in due)
+        removed = self.apply_retention()
+        return moved, removed
+
+
+class PartitionArchiver:
+    """Background thread that archives cold months and applies the retention policy"""
+
+    def __init__(self, store, interval_seconds=3600):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.last_run = None
+        self.last_moved = 0
+        self.last_removed = []
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='partition-archiver', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Partition archiver started: {self.store.hot_months} hot month(s), "
+                    f"retention {self.store.retention_months or 'unlimited'} month(s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self.store.pool.connection() as conn:
+            partitions = self.store.partitions(conn)
+        return {
+            'hot_months': self.store.hot_months,
+            'retention_months': self.store.retention_months,
+            'archived_months': [
+                {'month': month, 'rows': row_count, 'state': state} for month, _, row_count, state in partitions
+            ],
+            'last_run': self.last_run,
+            'last_moved': self.last_moved,
+            'last_removed': self.last_removed,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.last_moved, self.last_removed = self.store.run_once()
+                self.last_run = datetime.now(timezone.utc).isoformat()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Partition archiving failed: {e}")
+            self._stop.wait(self.interval_seconds)
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(image_bytes, model_type, model_version):
+    """Key a prediction by the uploaded bytes and the exact model that produced it"""
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"{model_type}:{model_version}:{digest}"
+
+
+PRUNE_EVERY_WRITES = 256
+
+
+class PredictionCache:
+    """Two-tier prediction cache: an in-process LRU with TTL, optionally backed by SQLite"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=86400, db_path=None, max_persistent_entries=100000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_persistent_entries = max_persistent_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # SQLite reads and commits take their own lock so memory hits never wait on a disk sync
+        self._db_lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._counters = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'persistent_hits': 0, 'evictions': 0, 'pruned': 0}
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS prediction_cache (
+                    key TEXT PRIMARY KEY,
+                    class_index INTEGER,
+                    confidence REAL,
+                    created_at REAL
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_prediction_cache_created_at ON prediction_cache (created_at)')
+            self._conn.commit()
+
+    def get(self, key):
+        """Return (class_index, confidence) for a cached prediction, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[2] <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    self._counters['memory_hits'] += 1
+                    return entry[0], entry[1]
+                del self._entries[key]
+
+        entry = self._get_persistent(key, now)
+        with self._lock:
+            if entry is not None:
+                self._store(key, entry)
+                self._counters['hits'] += 1
+                self._counters['persistent_hits'] += 1
+                return entry[0], entry[1]
+
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, key, class_index, confidence):
+        entry = (int(class_index), float(confidence), time.time())
+        with self._lock:
+            self._store(key, entry)
+        if self._conn is None:
+            return
+        with self._db_lock:
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO prediction_cache (key, class_index, confidence, created_at) VALUES (?, ?, ?, ?)',
+                    (key, *entry)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= PRUNE_EVERY_WRITES:
+                    self._writes_since_prune = 0
+                    self._prune(entry[2])
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist cache entry: {e}")
+
+    def _prune(self, now):
+        """Drop expired rows and the oldest rows beyond max_persistent_entries; caller holds _db_lock"""
+        pruned = self._conn.execute('DELETE FROM prediction_cache WHERE created_at < ?', (now - self.ttl_seconds,)).rowcount
+        pruned += self._conn.execute('''
+            DELETE FROM prediction_cache WHERE key IN (
+                SELECT key FROM prediction_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_persistent_entries,)).rowcount
+        if pruned:
+            with self._lock:
+                self._counters['pruned'] += pruned
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'hit_rate': round(self._counters['hits'] / lookups, 4) if lookups else 0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': self._conn is not None
+            }
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def _get_persistent(self, key, now):
+        if self._conn is None:
+            return None
+        with self._db_lock:
+            return self._read_persistent(key, now)
+
+    def _read_persistent(self, key, now):
+        try:
+            row = self._conn.execute(
+                'SELECT class_index, confidence, created_at FROM prediction_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl_seconds:
+                self._conn.execute('DELETE FROM prediction_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            return row
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read cache entry: {e}")
+            return None
@@ -0,0 +1,153 @@
+"""Running aggregates over predictions, updated in the same transaction as each insert.
+
+/stats and /analytics read these instead of scanning the predictions table. Distinct users are
+counted with a HyperLogLog sketch stored one register per row, so updates are single-row upserts
+and sketches from different databases merge by taking the per-register maximum.
+"""
+import hashlib
+import math
+from collections import Counter
+
+SKETCH_PRECISION = 12  # 2**12 registers: about 1.6% standard error
+SKETCH_REGISTERS = 1 << SKETCH_PRECISION
+
+TABLES = [
+    '''CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS stats_model_counts (
+        model_type TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0,
+        confidence_sum REAL NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS stats_class_counts (
+        model_type TEXT NOT NULL,
+        predicted_class TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (model_type, predicted_class)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS stats_user_sketch (
+        register INTEGER PRIMARY KEY,
+        rank INTEGER NOT NULL
+    )'''
+]
+STATS_TABLES = ['stats_counters', 'stats_model_counts', 'stats_class_counts', 'stats_user_sketch']
+
+
+def create_tables(cursor):
+    for statement in TABLES:
+        cursor.execute(statement)
+
+
+def sketch_update(value):
+    """HyperLogLog (register, rank) for one value"""
+    digest = int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+    register = digest >> (64 - SKETCH_PRECISION)
+    remaining = digest & ((1 << (64 - SKETCH_PRECISION)) - 1)
+    rank = (64 - SKETCH_PRECISION) - remaining.bit_length() + 1
+    return register, rank
+
+
+def sketch_estimate(ranks):
+    """Cardinality estimate from the non-zero register ranks"""
+    m = SKETCH_REGISTERS
+    zeros = m - len(ranks)
+    harmonic = zeros + sum(2.0 ** -rank for rank in ranks)
+    estimate = (0.7213 / (1 + 1.079 / m)) * m * m / harmonic
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is more accurate while most registers are still empty
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
+
+
+def _add_counter(cursor, name, delta):
+    cursor.execute('''
+        INSERT INTO stats_counters (name, value) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+    ''', (name, delta))
+
+
+def record_predictions(cursor, predictions):
+    """Fold (model_type, predicted_class, confidence, user_ip) tuples into the aggregates"""
+    predictions = list(predictions)
+    if not predictions:
+        return
+    models = {}
+    classes = Counter()
+    registers = {}
+    confidence_total = 0.0
+    for model_type, predicted_class, confidence, user_ip in predictions:
+        confidence = confidence or 0.0
+        confidence_total += confidence
+        count, confidence_sum = models.get(model_type, (0, 0.0))
+        models[model_type] = (count + 1, confidence_sum + confidence)
+        classes[(model_type, predicted_class)] += 1
+        register, rank = sketch_update(user_ip or 'unknown')
+        registers[register] = max(rank, registers.get(register, 0))
+
+    _add_counter(cursor, 'predictions', len(predictions))
+    _add_counter(cursor, 'confidence_sum', confidence_total)
+    cursor.executemany('''
+        INSERT INTO stats_model_counts (model_type, count, confidence_sum) VALUES (?, ?, ?)
+        ON CONFLICT (model_type) DO UPDATE SET count = count + excluded.count,
+                                               confidence_sum = confidence_sum + excluded.confidence_sum
+    ''', [(model_type, count, confidence_sum) for model_type, (count, confidence_sum) in models.items()])
+    cursor.executemany('''
+        INSERT INTO stats_class_counts (model_type, predicted_class, count) VALUES (?, ?, ?)
+        ON CONFLICT (model_type, predicted_class) DO UPDATE SET count = count + excluded.count
+    ''', [(model_type, predicted_class, count) for (model_type, predicted_class), count in classes.items()])
+    cursor.executemany('''
+        INSERT INTO stats_user_sketch (register, rank) VALUES (?, ?)
+        ON CONFLICT (register) DO UPDATE SET rank = MAX(rank, excluded.rank)
+    ''', list(registers.items()))
+
+
+def record_contact(cursor):
+    _add_counter(cursor, 'contacts', 1)
+
+
+def read(cursor):
+    """Current aggregates; cost depends on the number of models, classes and sketch registers, not rows"""
+    counters = dict(cursor.execute('SELECT name, value FROM stats_counters').fetchall())
+    total = int(counters.get('predictions', 0))
+    ranks = [row[0] for row in cursor.execute('SELECT rank FROM stats_user_sketch')]
+    return {
+        'total_predictions': total,
+        'average_confidence': counters.get('confidence_sum', 0.0) / total if total else 0,
+        'total_users': sketch_estimate(ranks) if ranks else 0,
+        'total_contacts': int(counters.get('contacts', 0)),
+        'models': [
+            {'model': model_type, 'count': count, 'average_confidence': round(confidence_sum / count, 4) if count else 0}
+            for model_type, count, confidence_sum in cursor.execute(
+                'SELECT model_type, count, confidence_sum FROM stats_model_counts ORDER BY count DESC'
+            )
+        ],
+        'classes': [
+            {'model': model_type, 'predicted_class': predicted_class, 'count': count}
+            for model_type, predicted_class, count in cursor.execute(
+                'SELECT model_type, predicted_class, count FROM stats_class_counts ORDER BY count DESC'
+            )
+        ]
+    }
+
+
+def rebuild(cursor, predictions=None):
+    """Recompute every aggregate from the raw tables; run inside a write transaction.
+
+    predictions overrides the source rows, e.g. to include archived months.
+    """
+    create_tables(cursor)
+    for table in STATS_TABLES:
+        cursor.execute(f'DELETE FROM {table}')
+    if predictions is None:
+        predictions = cursor.connection.execute('SELECT model_type, predicted_class, confidence, user_ip FROM predictions')
+    batch = []
+    for row in predictions:
+        batch.append(row)
+        if len(batch) >= 10000:
+            record_predictions(cursor, batch)
+            batch = []
+    record_predictions(cursor, batch)
+    contacts = cursor.execute('SELECT COUNT(*) FROM contacts').fetchone()[0]
+    _add_counter(cursor, 'contacts', contacts)
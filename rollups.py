@@ -0,0 +1,204 @@
+"""Hourly and daily prediction counts per model and class, for trend queries.
+
+Inserts add to the hourly bucket in the same transaction as the prediction. A background
+compactor folds hourly buckets older than the retention window into daily buckets, so
+/analytics/trends reads a few small tables however large predictions grows.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+TABLES = [
+    '''CREATE TABLE IF NOT EXISTS rollup_hourly (
+        bucket TEXT NOT NULL,
+        model_type TEXT NOT NULL,
+        predicted_class TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        confidence_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, model_type, predicted_class)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS rollup_daily (
+        bucket TEXT NOT NULL,
+        model_type TEXT NOT NULL,
+        predicted_class TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        confidence_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, model_type, predicted_class)
+    )'''
+]
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def create_tables(cursor):
+    for statement in TABLES:
+        cursor.execute(statement)
+
+
+def hour_bucket(timestamp):
+    """'YYYY-MM-DD HH:MM:SS' -> 'YYYY-MM-DD HH:00:00'"""
+    return f"{timestamp[:13]}:00:00"
+
+
+def record_predictions(cursor, predictions):
+    """Add (timestamp, model_type, predicted_class, confidence) tuples to their hourly buckets"""
+    buckets = defaultdict(lambda: [0, 0.0])
+    for timestamp, model_type, predicted_class, confidence in predictions:
+        bucket = buckets[(hour_bucket(timestamp), model_type or 'leaf', predicted_class or '')]
+        bucket[0] += 1
+        bucket[1] += confidence or 0.0
+    if not buckets:
+        return
+    cursor.executemany('''
+        INSERT INTO rollup_hourly (bucket, model_type, predicted_class, count, confidence_sum) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, model_type, predicted_class) DO UPDATE SET
+            count = count + excluded.count,
+            confidence_sum = confidence_sum + excluded.confidence_sum
+    ''', [(*key, count, confidence_sum) for key, (count, confidence_sum) in buckets.items()])
+
+
+def compact(conn, retention_hours):
+    """Fold hourly buckets older than the retention window into daily ones; returns rows folded"""
+    cutoff = hour_bucket((datetime.now(timezone.utc) - timedelta(hours=retention_hours)).strftime(TIMESTAMP_FORMAT))
+    # Only ever a few hours of buckets per run, so the write lock is held briefly
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('''
+            INSERT INTO rollup_daily (bucket, model_type, predicted_class, count, confidence_sum)
+            SELECT substr(bucket, 1, 10), model_type, predicted_class, SUM(count), SUM(confidence_sum)
+            FROM rollup_hourly WHERE bucket < ?
+            GROUP BY substr(bucket, 1, 10), model_type, predicted_class
+            ON CONFLICT (bucket, model_type, predicted_class) DO UPDATE SET
+                count = count + excluded.count,
+                confidence_sum = confidence_sum + excluded.confidence_sum
+        ''', (cutoff,))
+        folded = conn.execute('DELETE FROM rollup_hourly WHERE bucket < ?', (cutoff,)).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return folded
+
+
+def query_trends(cursor, start, end, granularity='day', model_type=None, predicted_class=None):
+    """Counts per bucket between start and end ('YYYY-MM-DD HH:MM:SS') at 'hour' or 'day' granularity; days are whole"""
+    filters = ''
+    params = []
+    if model_type:
+        filters += ' AND model_type = ?'
+        params.append(model_type)
+    if predicted_class:
+        filters += ' AND predicted_class = ?'
+        params.append(predicted_class)
+
+    if granularity == 'hour':
+        # Hourly detail only exists inside the retention window
+        sql = f'''
+            SELECT bucket, model_type, predicted_class, count, confidence_sum FROM rollup_hourly
+            WHERE bucket >= ? AND bucket <= ?{filters}
+        '''
+        rows = cursor.execute(sql, [hour_bucket(start), end, *params]).fetchall()
+    else:
+        # Days not yet compacted are still spread over hourly buckets
+        sql = f'''
+            SELECT bucket, model_type, predicted_class, SUM(count), SUM(confidence_sum) FROM (
+                SELECT bucket, model_type, predicted_class, count, confidence_sum FROM rollup_daily
+                WHERE bucket >= ? AND bucket <= ?{filters}
+                UNION ALL
+                SELECT substr(bucket, 1, 10), model_type, predicted_class, count, confidence_sum FROM rollup_hourly
+                WHERE bucket >= ? AND bucket <= ?{filters}
+            )
+            GROUP BY bucket, model_type, predicted_class
+        '''
+        rows = cursor.execute(sql, [start[:10], end[:10], *params, start[:10], f"{end[:10]} 23:59:59", *params]).fetchall()
+
+    return [
+        {
+            'bucket': bucket,
+            'model_type': row_model_type,
+            'predicted_class': row_class,
+            'count': count,
+            'average_confidence': round(confidence_sum / count, 4) if count else 0
+        }
+        for bucket, row_model_type, row_class, count, confidence_sum in sorted(rows)
+    ]
+
+
+def rebuild(cursor, predictions=None):
+    """Recompute the rollups from the raw predictions; run inside a write transaction.
+
+    predictions overrides the source (timestamp, model_type, predicted_class, confidence) rows, e.g.
+    to include archived months; buckets past the hourly retention are compacted on the next run.
+    """
+    create_tables(cursor)
+    cursor.execute('DELETE FROM rollup_hourly')
+    cursor.execute('DELETE FROM rollup_daily')
+    if predictions is not None:
+        batch = []
+        for row in predictions:
+            if row[0] is None:
+                continue
+            batch.append(row)
+            if len(batch) >= 10000:
+                record_predictions(cursor, batch)
+                batch = []
+        record_predictions(cursor, batch)
+        return
+    cursor.execute('''
+        INSERT INTO rollup_hourly (bucket, model_type, predicted_class, count, confidence_sum)
+        SELECT substr(timestamp, 1, 13) || ':00:00', COALESCE(model_type, 'leaf'), COALESCE(predicted_class, ''),
+               COUNT(*), COALESCE(SUM(confidence), 0)
+        FROM predictions WHERE timestamp IS NOT NULL
+        GROUP BY 1, 2, 3
+    ''')
+
+
+class RollupCompactor:
+    """Background thread that periodically compacts hourly rollups into daily ones"""
+
+    def __init__(self, pool, retention_hours=48, interval_seconds=300):
+        self.pool = pool
+        self.retention_hours = retention_hours
+        self.interval_seconds = interval_seconds
+        self.last_run = None
+        self.last_folded = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rollup-compactor', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Rollup compactor started: hourly buckets kept for {self.retention_hours}h")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        started = time.monotonic()
+        with self.pool.connection() as conn:
+            self.last_folded = compact(conn, self.retention_hours)
+        self.last_run = datetime.now(timezone.utc).isoformat()
+        if self.last_folded:
+            logger.info(f"Compacted {self.last_folded} hourly rollups in {(time.monotonic() - started) * 1000:.1f}ms")
+
+    def stats(self):
+        return {
+            'retention_hours': self.retention_hours,
+            'interval_seconds': self.interval_seconds,
+            'last_run': self.last_run,
+            'last_folded': self.last_folded,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Rollup compaction failed: {e}")
+            self._stop.wait(self.interval_seconds)
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from tensorflow.keras.applications import MobileNetV3Small
+from tensorflow.keras.optimizers import Adam
+
+# Compact first-stage model for cascade inference in app.py.
+# Usage: python train_cascade_model.py fruit|leaf
+
+# Configuration
+CONFIG = {
+    'fruit': {
+        'data_path': 'data/fruit_diseases',
+        'mapping_path': 'mappings/fruit_classes.json',
+        'model_save_path': 'models/fruit_model_fast.keras',
+        'thresholds_save_path': 'mappings/fruit_cascade_thresholds.json'
+    },
+    'leaf': {
+        'data_path': 'data/train',
+        'mapping_path': 'mappings/leaf_classes.json',
+        'model_save_path': 'models/leaf_disease_model_fast.keras',
+        'thresholds_save_path': 'mappings/leaf_cascade_thresholds.json'
+    }
+}
+IMG_SIZE = (224, 224)
+BATCH_SIZE = 32
+EPOCHS = 15
+LR = 1e-3
+VAL_SPLIT = 0.2
+TARGET_PRECISION = 0.99   # Fast-stage answers must be at least this precise per class
+MAX_THRESHOLD = 0.999
+
+model_type = sys.argv[1] if len(sys.argv) > 1 else 'leaf'
+config = CONFIG[model_type]
+os.makedirs(os.path.dirname(config['model_save_path']), exist_ok=True)
+
+# Reuse the full model's class order so both stages share one mapping
+with open(config['mapping_path'], 'r') as f:
+    class_mapping = {int(k): v for k, v in json.load(f).items()}
+class_names = [class_mapping[i] for i in sorted(class_mapping)]
+
+# Data generators (same /255 preprocessing as the serving path)
+datagen = ImageDataGenerator(
+    rescale=1./255,
+    rotation_range=20,
+    width_shift_range=0.2,
+    height_shift_range=0.2,
+    zoom_range=0.2,
+    horizontal_flip=True,
+    validation_split=VAL_SPLIT
+)
+
+train_gen = datagen.flow_from_directory(
+    config['data_path'], target_size=IMG_SIZE, batch_size=BATCH_SIZE, classes=class_names,
+    class_mode='categorical', subset='training', shuffle=True
+)
+val_gen = datagen.flow_from_directory(
+    config['data_path'], target_size=IMG_SIZE, batch_size=BATCH_SIZE, classes=class_names,
+    class_mode='categorical', subset='validation', shuffle=False
+)
+
+# Build model: MobileNetV3Small expects 0-255 inputs, so undo the /255 inside the graph
+base = MobileNetV3Small(weights='imagenet', include_top=False, input_shape=(*IMG_SIZE, 3))
+base.trainable = False
+
+inputs = layers.Input(shape=(*IMG_SIZE, 3))
+x = layers.Rescaling(255.0)(inputs)
+x = base(x, training=False)
+x = layers.GlobalAveragePooling2D()(x)
+x = layers.Dropout(0.3)(x)
+outputs = layers.Dense(len(class_names), activation='softmax')(x)
+model = models.Model(inputs, outputs)
+
+model.compile(optimizer=Adam(LR), loss='categorical_crossentropy', metrics=['accuracy'])
+print(f"Fast {model_type} model parameters: {model.count_params():,}")
+
+callbacks = [
+    tf.keras.callbacks.EarlyStopping(monitor='val_accuracy', patience=4, restore_best_weights=True)
+]
+model.fit(train_gen, epochs=EPOCHS, validation_data=val_gen, callbacks=callbacks)
+
+model.save(config['model_save_path'])
+print(f"Fast {model_type} model saved to {config['model_save_path']}")
+
+# Calibrate per-class confidence thresholds on the validation split: the lowest threshold at
+# which the fast model's answers for that class reach TARGET_PRECISION
+probabilities = model.predict(val_gen, verbose=0)
+predicted = np.argmax(probabilities, axis=1)
+confidence = np.max(probabilities, axis=1)
+labels = val_gen.classes
+
+thresholds = {}
+for index, name in enumerate(class_names):
+    threshold = MAX_THRESHOLD
+    for candidate in np.arange(0.5, MAX_THRESHOLD, 0.01):
+        answered = (predicted == index) & (confidence >= candidate)
+        if answered.sum() and (labels[answered] == index).mean() >= TARGET_PRECISION:
+            threshold = float(round(candidate, 2))
+            break
+    thresholds[name] = threshold
+    print(f"  {name}: {threshold}")
+
+with open(config['thresholds_save_path'], 'w') as f:
+    json.dump(thresholds, f, indent=2)
+print(f"Cascade thresholds saved to {config['thresholds_save_path']}")
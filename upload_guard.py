@@ -0,0 +1,78 @@
+import io
+
+from PIL import Image, UnidentifiedImageError
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from image_decoding import open_image
+
+IMAGE_SIGNATURES = {
+    b'\xff\xd8\xff': 'jpeg',
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif'
+}
+ZIP_SIGNATURES = (b'PK\x03\x04',)
+SNIFF_BYTES = 8
+
+
+class UploadRejected(Exception):
+    """An upload failed validation before decoding"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GuardedUploadStream(io.BytesIO):
+    """In-memory buffer for one multipart part that enforces a size cap and checks magic bytes as data streams in"""
+
+    def __init__(self, max_bytes, signatures):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.signatures = tuple(signatures)
+        self._sniffed = False
+
+    def write(self, data):
+        if self.tell() + len(data) > self.max_bytes:
+            raise RequestEntityTooLarge(f'Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit')
+        written = super().write(data)
+        if not self._sniffed and self.tell() >= SNIFF_BYTES:
+            if not self.getvalue()[:SNIFF_BYTES].startswith(self.signatures):
+                raise UnsupportedMediaType('Upload is not a supported image (JPEG, PNG or GIF)')
+            self._sniffed = True
+        return written
+
+
+def sniff_format(header):
+    for signature, image_format in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+def validate_image(image_bytes, max_pixels):
+    """Check format, completeness and pixel count from the header alone; returns the detected format"""
+    image_format = sniff_format(image_bytes[:SNIFF_BYTES])
+    if image_format is None:
+        raise UploadRejected('Upload is not a supported image (JPEG, PNG or GIF)', 415)
+
+    # Cheap truncation checks on the end-of-image markers
+    if image_format == 'jpeg' and image_bytes.rfind(b'\xff\xd9') == -1:
+        raise UploadRejected('Image data is truncated')
+    if image_format == 'png' and b'IEND' not in image_bytes[-16:]:
+        raise UploadRejected('Image data is truncated')
+    if image_format == 'gif' and not image_bytes.rstrip(b'\x00').endswith(b'\x3b'):
+        raise UploadRejected('Image data is truncated')
+
+    # Image.open only parses the header; pixel data is not decoded here
+    try:
+        with open_image(image_bytes) as img:
+            width, height = img.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise UploadRejected(f'Unreadable image header: {e}')
+
+    if width <= 0 or height <= 0:
+        raise UploadRejected('Image has no pixels')
+    if width * height > max_pixels:
+        raise UploadRejected(f'Image is too large ({width}x{height}), maximum is {max_pixels:,} pixels', 413)
+    return image_format
@@ -0,0 +1,256 @@
+import atexit
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INPUT_SHAPE = (224, 224, 3)
+MAX_CLASSES = 1024
+READY_TIMEOUT_SECONDS = 600
+ACQUIRE_TIMEOUT_SECONDS = 60
+
+
+class WorkerPoolTimeoutError(RuntimeError):
+    """No inference worker became free in time, e.g. because every worker is dead and failing to restart"""
+
+
+def _worker_main(cpu, model_backends, warmup_batch_sizes, input_name, output_name, max_rows, conn):
+    """Inference worker: owns its own copy of every model and reads/writes tensors through shared memory"""
+    from inference_backends import load_backend
+
+    num_threads = None
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+        num_threads = 1
+
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((max_rows, *INPUT_SHAPE), dtype=np.float32, buffer=input_shm.buf)
+    outputs = np.ndarray((max_rows * MAX_CLASSES,), dtype=np.float32, buffer=output_shm.buf)
+
+    backends = {}
+    errors = {}
+    for model_type, (kind, model_path) in model_backends.items():
+        try:
+            backends[model_type] = load_backend(kind, model_path, num_threads=num_threads)
+            for batch_size in sorted(set(warmup_batch_sizes)):
+                backends[model_type].predict(np.zeros((min(batch_size, max_rows), *INPUT_SHAPE), dtype=np.float32))
+        except Exception as e:
+            errors[model_type] = str(e)
+    conn.send(('ready', errors))
+
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            model_type, rows = message
+            try:
+                result = backends[model_type].predict(inputs[:rows])
+                num_classes = result.shape[1]
+                outputs[:rows * num_classes] = result.ravel()
+                conn.send(('ok', num_classes))
+            except Exception as e:
+                conn.send(('error', str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del inputs, outputs
+        input_shm.close()
+        output_shm.close()
+
+
+class _WorkerSlot:
+    """One worker process plus the shared-memory buffers the web tier hands it tensors through"""
+
+    def __init__(self, index, cpu, max_rows):
+        self.index = index
+        self.cpu = cpu
+        self.input_shm = shared_memory.SharedMemory(create=True, size=max_rows * int(np.prod(INPUT_SHAPE)) * 4)
+        self.output_shm = shared_memory.SharedMemory(create=True, size=max_rows * MAX_CLASSES * 4)
+        self.inputs = np.ndarray((max_rows, *INPUT_SHAPE), dtype=np.float32, buffer=self.input_shm.buf)
+        self.outputs = np.ndarray((max_rows * MAX_CLASSES,), dtype=np.float32, buffer=self.output_shm.buf)
+        self.process = None
+        self.conn = None
+
+
+class PooledModel:
+    """Keras-style predict() that runs on the worker pool"""
+
+    def __init__(self, pool, model_type):
+        self.pool = pool
+        self.model_type = model_type
+
+    def predict(self, batch, verbose=0):
+        return self.pool.predict(self.model_type, batch)
+
+
+class InferenceWorkerPool:
+    """Pool of per-core inference processes fed through shared memory, restarting workers that die"""
+
+    def __init__(self, model_backends, num_workers=None, max_rows=16, pin_cores=True, warmup_batch_sizes=()):
+        if hasattr(os, 'sched_getaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+
+        self.model_backends = dict(model_backends)
+        self.num_workers = num_workers or len(cpus)
+        self.max_rows = max_rows
+        self.warmup_batch_sizes = list(warmup_batch_sizes)
+        self.model_errors = {}
+
+        self._ctx = mp.get_context('spawn')
+        self._slots = [
+            _WorkerSlot(i, cpus[i % len(cpus)] if pin_cores else None, max_rows)
+            for i in range(self.num_workers)
+        ]
+        self._idle = queue.Queue()
+        self._dead = queue.Queue()
+        self._lock = threading.Lock()
+        self._restarts = 0
+        self._requests = 0
+        self._running = False
+
+    def start(self):
+        """Spawn every worker and block until each has loaded and warmed its models"""
+        self._running = True
+        # Launch them all before waiting so the workers load their models in parallel
+        for slot in self._slots:
+            self._launch(slot)
+        for slot in self._slots:
+            self._await_ready(slot)
+        threading.Thread(target=self._monitor, name='worker-pool-monitor', daemon=True).start()
+        atexit.register(self.shutdown)
+        logger.info(f"Inference worker pool started with {self.num_workers} workers")
+
+    def model(self, model_type):
+        if model_type in self.model_errors:
+            raise RuntimeError(self.model_errors[model_type])
+        return PooledModel(self, model_type)
+
+    def predict(self, model_type, batch):
+        if len(batch) > self.max_rows:
+            return np.concatenate([
+                self.predict(model_type, batch[i:i + self.max_rows])
+                for i in range(0, len(batch), self.max_rows)
+            ], axis=0)
+
+        slot = self._acquire()
+        rows = len(batch)
+        # A worker left with a request in flight can't be reused: its next reply would be stale
+        in_flight = False
+        try:
+            slot.inputs[:rows] = batch
+            in_flight = True
+            try:
+                slot.conn.send((model_type, rows))
+                status, payload = slot.conn.recv()
+            except (EOFError, OSError) as e:
+                raise RuntimeError(f"Inference worker {slot.index} died: {e}")
+            in_flight = False
+
+            if status != 'ok':
+                raise RuntimeError(payload)
+            return slot.outputs[:rows * payload].reshape(rows, payload).copy()
+        finally:
+            if in_flight:
+                self._retire(slot)
+            else:
+                with self._lock:
+                    self._requests += 1
+                self._idle.put(slot)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.num_workers,
+                'alive': sum(1 for slot in self._slots if slot.process is not None and slot.process.is_alive()),
+                'idle': self._idle.qsize(),
+                'restarts': self._restarts,
+                'requests': self._requests,
+                'pinned_cpus': [slot.cpu for slot in self._slots]
+            }
+
+    def shutdown(self):
+        if not self._running:
+            return
+        self._running = False
+        self._dead.put(None)
+        for slot in self._slots:
+            try:
+                slot.conn.send(None)
+            except (OSError, AttributeError):
+                pass
+            if slot.process is not None:
+                slot.process.join(timeout=5)
+                if slot.process.is_alive():
+                    slot.process.kill()
+            slot.inputs = slot.outputs = None
+            slot.input_shm.close()
+            slot.input_shm.unlink()
+            slot.output_shm.close()
+            slot.output_shm.unlink()
+
+    def _spawn(self, slot):
+        self._launch(slot)
+        self._await_ready(slot)
+
+    def _launch(self, slot):
+        parent_conn, child_conn = self._ctx.Pipe()
+        slot.process = self._ctx.Process(
+            target=_worker_main,
+            args=(slot.cpu, self.model_backends, self.warmup_batch_sizes,
+                  slot.input_shm.name, slot.output_shm.name, self.max_rows, child_conn),
+            name=f"inference-worker-{slot.index}",
+            daemon=True
+        )
+        slot.process.start()
+        child_conn.close()
+        slot.conn = parent_conn
+
+    def _await_ready(self, slot):
+        if not slot.conn.poll(READY_TIMEOUT_SECONDS):
+            raise RuntimeError(f"Inference worker {slot.index} did not become ready")
+        _, errors = slot.conn.recv()
+        self.model_errors = errors
+        self._idle.put(slot)
+
+    def _acquire(self, timeout=ACQUIRE_TIMEOUT_SECONDS):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                slot = self._idle.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise WorkerPoolTimeoutError(f"No inference worker became available within {timeout}s")
+            if slot.process.is_alive():
+                return slot
+            self._retire(slot)
+
+    def _retire(self, slot):
+        if slot.process.is_alive():
+            slot.process.kill()
+        self._dead.put(slot)
+
+    def _monitor(self):
+        while self._running:
+            slot = self._dead.get()
+            if slot is None or not self._running:
+                break
+            logger.warning(f"Restarting inference worker {slot.index}")
+            try:
+                slot.process.join(timeout=5)
+                self._spawn(slot)
+                with self._lock:
+                    self._restarts += 1
+            except Exception as e:
+                logger.error(f"Failed to restart inference worker {slot.index}: {e}")
+                time.sleep(1)
+                self._dead.put(slot)
@@ -0,0 +1,178 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from rollups import TIMESTAMP_FORMAT
+
+logger = logging.getLogger(__name__)
+
+MAX_FLUSH_ATTEMPTS = 3
+
+
+class WriteQueueFullError(Exception):
+    """The write-behind queue stayed full for longer than the submit timeout"""
+
+
+class PredictionWriter:
+    """Write-behind queue for prediction rows, flushed in group-committed transactions.
+
+    Ids are allocated here rather than by SQLite, so callers get their prediction_id before the row
+    is written. That only holds while this writer is the sole source of prediction inserts, i.e. a
+    single server process with every insert routed through submit().
+    """
+
+    def __init__(self, pool, insert_fn, max_queue_size=10000, flush_size=256, flush_interval_ms=50, submit_timeout=5):
+        self.pool = pool
+        self.insert_fn = insert_fn
+        self.max_queue_size = max_queue_size
+        self.flush_size = flush_size
+        self.flush_interval_ms = flush_interval_ms
+        self.submit_timeout = submit_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._committed = threading.Condition()
+        self._committed_through = 0
+        self._next_id = None
+        self._thread = threading.Thread(target=self._run, name='prediction-writer', daemon=True)
+        self._running = False
+        self._counters = {'submitted': 0, 'flushed': 0, 'batches': 0, 'failed': 0, 'flush_ms': 0.0}
+
+    def start(self):
+        with self.pool.connection() as conn:
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM predictions').fetchone()[0]
+            sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'predictions'").fetchone()
+        last_id = max(last_id, sequence[0] if sequence else 0)
+        self._next_id = last_id + 1
+        self._committed_through = last_id
+        self._running = True
+        self._thread.start()
+        atexit.register(self.shutdown)
+        logger.info(f"Write-behind enabled: flush every {self.flush_size} rows / {self.flush_interval_ms}ms, queue {self.max_queue_size}")
+
+    def submit(self, record):
+        """Queue one prediction row and return its id; blocks while the queue is full"""
+        prediction_id, = self.submit_many([record])
+        if prediction_id is None:
+            raise WriteQueueFullError(f"Write-behind queue stayed full for {self.submit_timeout}s")
+        return prediction_id
+
+    def submit_many(self, records):
+        """Queue several rows with consecutive ids; returns their ids, None for any tail left unqueued
+        because the queue stayed full past the submit timeout (rows before it will still be written)"""
+        if not self._running:
+            raise RuntimeError('Prediction writer is not running')
+        timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        deadline = time.monotonic() + self.submit_timeout
+        prediction_ids = []
+        # Allocation and enqueue happen under one lock so the queue stays in id order
+        with self._submit_lock:
+            for record in records:
+                prediction_id = self._next_id
+                try:
+                    self._queue.put((prediction_id, timestamp, *record), timeout=max(0, deadline - time.monotonic()))
+                except queue.Full:
+                    break
+                self._next_id += 1
+                prediction_ids.append(prediction_id)
+        with self._lock:
+            self._counters['submitted'] += len(prediction_ids)
+        if len(prediction_ids) < len(records):
+            logger.error(f"Write-behind queue full: dropped {len(records) - len(prediction_ids)} of {len(records)} rows")
+        return prediction_ids + [None] * (len(records) - len(prediction_ids))
+
+    def wait_for(self, prediction_id, timeout=5):
+        """Block until the row with this id has been committed (or dropped); returns False on timeout"""
+        with self._committed:
+            return self._committed.wait_for(lambda: self._committed_through >= prediction_id, timeout)
+
+    def pending(self, prediction_id):
+        return self._committed_through < prediction_id < (self._next_id or 0)
+
+    def stats(self):
+        with self._lock:
+            batches = self._counters['batches']
+            return {
+                'queued': self._queue.qsize(),
+                'max_queue_size': self.max_queue_size,
+                'submitted': self._counters['submitted'],
+                'flushed': self._counters['flushed'],
+                'failed': self._counters['failed'],
+                'batches': batches,
+                'avg_batch_size': round(self._counters['flushed'] / batches, 2) if batches else 0,
+                'avg_flush_ms': round(self._counters['flush_ms'] / batches, 2) if batches else 0
+            }
+
+    def shutdown(self):
+        """Stop accepting rows and flush everything still queued"""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        self._thread.join()
+        logger.info(f"Write-behind queue drained: {self._counters['flushed']} rows written")
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            row = self._queue.get()
+            if row is None:
+                break
+            rows = [row]
+            deadline = time.monotonic() + self.flush_interval_ms / 1000.0
+            while len(rows) < self.flush_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                rows.append(row)
+            self._flush(rows)
+
+        # Drain anything submitted between the sentinel and the last flush
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not None:
+                rows.append(row)
+        for start in range(0, len(rows), self.flush_size):
+            self._flush(rows[start:start + self.flush_size])
+
+    def _flush(self, rows):
+        started = time.monotonic()
+        written = False
+        for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+            try:
+                with self.pool.connection() as conn:
+                    self.insert_fn(conn.cursor(), rows)
+                    conn.commit()
+                written = True
+                break
+            except Exception as e:
+                if attempt == MAX_FLUSH_ATTEMPTS:
+                    logger.error(f"Dropping {len(rows)} predictions after {attempt} failed flushes: {e}")
+                else:
+                    logger.warning(f"Prediction flush failed (attempt {attempt}): {e}")
+                    time.sleep(0.1 * attempt)
+
+        with self._lock:
+            if written:
+                self._counters['flushed'] += len(rows)
+                self._counters['batches'] += 1
+                self._counters['flush_ms'] += (time.monotonic() - started) * 1000
+            else:
+                self._counters['failed'] += len(rows)
+        # Dropped rows also advance the watermark so waiters are not stuck behind them
+        with self._committed:
+            self._committed_through = rows[-1][0]
+            self._committed.notify_all()